@@ -0,0 +1,266 @@
+import asyncio, hashlib
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+from flask_jwt_extended import decode_token
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags
+
+from App.config import POSTGRES_POOL_DEFAULTS
+from App.database import db
+from App.models import User, Accolade, Milestone
+from App.models.hour_log import format_log_time
+from App.controllers import (
+    CachedIdentity,
+    cached_identity,
+    cache_identity,
+    ranking_query,
+    leaderboard_table,
+    leaderboard_top_query,
+    leaderboard_after_query,
+    leaderboard_student_query,
+    leaderboard_neighbour_queries,
+    encode_leaderboard_cursor,
+    student_log_query
+)
+from App.response_cache import CachedResponse, MemoryCacheBackend, cache_key, count_cache_outcome, get_cache_backend
+from App.views.user import LEADERBOARD_CACHE_TTL, leaderboard_entry, leaderboard_window
+from App.views.student import student_log_args, student_log_entry
+
+# asyncio drivers for the dialects the app's engine can use
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def create_async_read_engine(app):
+    # The app's database through its asyncio driver, or ASYNC_DATABASE_URI when set,
+    # with the same PostgreSQL pool settings as the sync engine
+    config = app.config
+    if config.get('ASYNC_DATABASE_URI'):
+        url = make_url(config['ASYNC_DATABASE_URI'])
+    else:
+        with app.app_context():
+            url = db.engine.url
+        if url.get_backend_name() not in ASYNC_DRIVERS:
+            raise ValueError(f"No async driver for {url.get_backend_name()}; set ASYNC_DATABASE_URI")
+        url = url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+    options = {}
+    if url.get_backend_name() == 'postgresql':
+        # The DB_* keys are only filled in for a PostgreSQL sync URI, so default them here too
+        pool = {key: config.get(key, value) for key, value in POSTGRES_POOL_DEFAULTS.items()}
+        options = {
+            'pool_size': pool['DB_POOL_SIZE'],
+            'max_overflow': pool['DB_MAX_OVERFLOW'],
+            'pool_timeout': pool['DB_POOL_TIMEOUT'],
+            'pool_recycle': pool['DB_POOL_RECYCLE'],
+            'pool_pre_ping': True,
+            'connect_args': {'server_settings': {'statement_timeout': str(pool['DB_STATEMENT_TIMEOUT_MS'])}},
+        }
+    elif config.get('SQLITE_TUNED'):
+        options = {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}}
+    return create_async_engine(url, **options)
+
+
+class AsyncReadAPI:
+    # ASGI app serving GET /leaderboard, /student/logs and /student/accolades with async
+    # database access, so one process can hold many pollers. Everything else, and any
+    # request without a usable access token, goes to the Flask app on a thread pool, which
+    # keeps writes, logins and auth errors exactly as they are.
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.engine = create_async_read_engine(flask_app)
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config.get('ASGI_WSGI_THREADS', 10))
+        self.routes = {
+            '/leaderboard': self.leaderboard,
+            '/student/logs': self.student_logs,
+            '/student/accolades': self.student_accolades,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        handler = self.routes.get(scope['path']) if scope['type'] == 'http' and scope['method'] == 'GET' else None
+        if handler is not None:
+            headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+            args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+            response = await handler(scope['path'], args, headers)
+            if response is not None:
+                return await self.respond(send, headers, *response)
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def json_body(self, payload):
+        # Byte for byte what jsonify writes outside debug mode, so ETags match the Flask routes
+        return (self.flask_app.json.dumps(payload, separators=(',', ':')) + '\n').encode()
+
+    async def respond(self, send, request_headers, status, body, etag=None):
+        headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        if etag is not None:
+            headers.append((b'etag', f'"{etag}"'.encode()))
+        # Same CORS headers Flask-Cors adds with its defaults
+        origin = request_headers.get('origin')
+        headers.append((b'access-control-allow-origin', (origin or '*').encode()))
+        if origin:
+            headers.append((b'vary', b'Origin'))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def identity(self, headers):
+        # The caller's CachedIdentity from a valid access token, or None to let Flask answer
+        config = self.flask_app.config
+        token = None
+        for location in config['JWT_TOKEN_LOCATION']:
+            if location == 'cookies' and 'cookie' in headers:
+                cookie = SimpleCookie(headers['cookie']).get(config['JWT_ACCESS_COOKIE_NAME'])
+                token = cookie.value if cookie else None
+            elif location == 'headers' and config['JWT_HEADER_NAME'].lower() in headers:
+                parts = headers[config['JWT_HEADER_NAME'].lower()].split()
+                token = parts[1] if len(parts) == 2 and parts[0] == config['JWT_HEADER_TYPE'] else None
+            if token:
+                break
+        if not token:
+            return None
+
+        with self.flask_app.app_context():
+            try:
+                claims = decode_token(token)
+                user_id = int(claims[config['JWT_IDENTITY_CLAIM']])
+            except Exception:
+                return None
+            if claims.get('type') != 'access':
+                return None
+            identity = cached_identity(user_id)
+        if identity is not None:
+            return identity
+
+        async with self.session() as session:
+            row = (await session.execute(
+                db.select(User.id, User.username, User.role).where(User.id == user_id)
+            )).first()
+        if row is None:
+            return None
+        identity = CachedIdentity(row.id, row.username, row.role)
+        with self.flask_app.app_context():
+            cache_identity(identity)
+        return identity
+
+    async def cache_call(self, backend, method, *args):
+        # The sqlite backend reads and writes a file, so it runs off the event loop
+        if isinstance(backend, MemoryCacheBackend):
+            return getattr(backend, method)(*args)
+        return await asyncio.to_thread(getattr(backend, method), *args)
+
+    async def leaderboard(self, path, args, headers):
+        # Shares the Flask route's response cache entries, TTL and ETags
+        config = self.flask_app.config
+        with self.flask_app.app_context():
+            backend = get_cache_backend()
+        ttl = config.get('RESPONSE_CACHE_TTLS', {}).get('user_views.leaderboard_page', LEADERBOARD_CACHE_TTL)
+        if backend is None or ttl <= 0:
+            status, payload = await self.leaderboard_payload(args)
+            return status, self.json_body(payload)
+
+        version = await self.cache_call(backend, 'version', 'leaderboard')
+        key = cache_key('leaderboard', version, path, args.items(multi=True))
+        cached = await self.cache_call(backend, 'get', key)
+        if cached is None:
+            count_cache_outcome('leaderboard', 'misses')
+            status, payload = await self.leaderboard_payload(args)
+            body = self.json_body(payload)
+            if status != 200:
+                return status, body
+            cached = CachedResponse(status, 'application/json', body, hashlib.sha1(body).hexdigest())
+            await self.cache_call(backend, 'set', key, cached, ttl)
+            count_cache_outcome('leaderboard', 'stores')
+        elif parse_etags(headers.get('if-none-match')).contains_weak(cached.etag):
+            count_cache_outcome('leaderboard', 'not_modified')
+            return 304, b'', cached.etag
+        else:
+            count_cache_outcome('leaderboard', 'hits')
+        return cached.status, cached.body, cached.etag
+
+    async def leaderboard_payload(self, args):
+        try:
+            window, params = leaderboard_window(args)
+        except ValueError as e:
+            return 400, {'message': str(e)}
+
+        async with self.session() as session:
+            if window == 'top':
+                rows = (await session.execute(leaderboard_top_query(params))).all()
+                return 200, {'leaderboard': [leaderboard_entry(row) for row in rows]}
+
+            if window == 'around':
+                student_id, radius = params
+                student = (await session.execute(leaderboard_student_query(student_id))).first()
+                if student is None:
+                    return 404, {'message': "Student not found"}
+                above, below = leaderboard_neighbour_queries(student, radius)
+                rows = list(reversed((await session.execute(above)).all())) + [student] + (await session.execute(below)).all()
+                return 200, {'leaderboard': [leaderboard_entry(row) for row in rows]}
+
+            if window == 'after':
+                cursor, limit = params
+                rows = (await session.execute(leaderboard_after_query(cursor, limit))).all()
+                next_cursor = encode_leaderboard_cursor(rows[-1]) if len(rows) == limit else None
+                return 200, {'leaderboard': [leaderboard_entry(row) for row in rows], 'next_cursor': next_cursor}
+
+            return 200, leaderboard_table((await session.execute(ranking_query())).all())
+
+    async def student_logs(self, path, args, headers):
+        student = await self.identity(headers)
+        if student is None:
+            return None
+        if student.role != 'student':
+            return 403, self.json_body({'message': "Only students can view their logs"})
+
+        try:
+            page, per_page, status = student_log_args(args)
+        except ValueError as e:
+            return 400, self.json_body({'message': str(e)})
+
+        query = student_log_query(student.id, status)
+        if page is not None:
+            query = query.limit(per_page).offset((page - 1) * per_page)
+        async with self.session() as session:
+            logs = (await session.execute(query)).all()
+
+        if not logs:
+            return 404, self.json_body({'message': "No logs found"})
+        return 200, self.json_body([student_log_entry(log) for log in logs])
+
+    async def student_accolades(self, path, args, headers):
+        student = await self.identity(headers)
+        if student is None:
+            return None
+        if student.role != 'student':
+            return 403, self.json_body({'message': "Only students can view their accolades"})
+
+        # Milestone names joined in, rather than read through the sync milestone cache
+        async with self.session() as session:
+            rows = (await session.execute(
+                db.select(Accolade.milestone, Milestone.name, Accolade.awarded_at)
+                .outerjoin(Milestone, Milestone.threshold == Accolade.milestone)
+                .where(Accolade.student_id == student.id)
+                .order_by(Accolade.milestone)
+            )).all()
+        return 200, self.json_body([{
+            'milestone': row.milestone,
+            'name': row.name or f"{row.milestone} hours",
+            'awarded_at': format_log_time(row.awarded_at)
+        } for row in rows])
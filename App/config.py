@@ -1,19 +1,86 @@
 import os
+from sqlalchemy.engine import URL, make_url
+
+from App.database import DIALECT_INSERTS, MeteredQueuePool
+
+# PostgreSQL pool settings, each overridable in the config file or as FLASK_ env vars
+POSTGRES_POOL_DEFAULTS = {
+    'DB_POOL_SIZE': 5,
+    'DB_MAX_OVERFLOW': 10,
+    'DB_POOL_TIMEOUT': 10,
+    'DB_POOL_RECYCLE': 1800,
+    'DB_STATEMENT_TIMEOUT_MS': 30000,
+}
+
+# SQLite pragmas for the opt-in SQLITE_TUNED profile
+SQLITE_TUNED_DEFAULTS = {
+    'SQLITE_BUSY_TIMEOUT_MS': 5000,
+    'SQLITE_CACHE_SIZE_KB': 65536,
+    'SQLITE_MMAP_SIZE': 268435456,
+}
+
+def postgres_uri_from_env():
+    # DATABASE_URL, or the POSTGRES_* variables render.yaml passes from its database
+    url = os.environ.get('DATABASE_URL')
+    if url:
+        # Some hosts still hand out the postgres:// scheme SQLAlchemy dropped
+        return 'postgresql://' + url[len('postgres://'):] if url.startswith('postgres://') else url
+    if os.environ.get('POSTGRES_URL'):
+        return URL.create(
+            'postgresql+psycopg2',
+            username=os.environ.get('POSTGRES_USER'),
+            password=os.environ.get('POSTGRES_PASSWORD'),
+            host=os.environ['POSTGRES_URL'],
+            port=os.environ.get('POSTGRES_PORT'),
+            database=os.environ.get('POSTGRES_DB')
+        ).render_as_string(hide_password=False)
+    return None
+
+def configure_database(config):
+    # Explicit pool settings for PostgreSQL. Keys in SQLALCHEMY_ENGINE_OPTIONS win.
+    # SQLITE_TUNED pragmas are applied per connection by App.database.tune_sqlite.
+    uri = str(config.get('SQLALCHEMY_DATABASE_URI', ''))
+    backend = make_url(uri).get_backend_name() if uri else None
+    if backend and backend not in DIALECT_INSERTS:
+        raise ValueError(f"Unsupported database '{backend}': only sqlite and postgresql are supported")
+    if uri.startswith('sqlite') and config.get('SQLITE_TUNED'):
+        for key, value in SQLITE_TUNED_DEFAULTS.items():
+            config.setdefault(key, value)
+    if not uri.startswith('postgresql'):
+        return
+    for key, value in POSTGRES_POOL_DEFAULTS.items():
+        config.setdefault(key, value)
+    options = {
+        'poolclass': MeteredQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+        'connect_args': {'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"},
+    }
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
 
 def load_config(app, overrides):
     if os.path.exists(os.path.join('./App', 'custom_config.py')):
         app.config.from_object('App.custom_config')
     else:
         app.config.from_object('App.default_config')
+    postgres_uri = postgres_uri_from_env()
+    if postgres_uri:
+        app.config['SQLALCHEMY_DATABASE_URI'] = postgres_uri
     app.config.from_prefixed_env()
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['TEMPLATES_AUTO_RELOAD'] = True
     app.config['PREFERRED_URL_SCHEME'] = 'https'
     app.config['UPLOADED_PHOTOS_DEST'] = "App/uploads"
+    app.config['UPLOADED_HOURSHEETS_DEST'] = "App/uploads/hour_sheets"
     app.config['JWT_ACCESS_COOKIE_NAME'] = 'access_token'
     app.config["JWT_TOKEN_LOCATION"] = ["cookies", "headers"]
     app.config["JWT_COOKIE_SECURE"] = True
     app.config["JWT_COOKIE_CSRF_PROTECT"] = False
     app.config['FLASK_ADMIN_SWATCH'] = 'darkly'
     for key in overrides:
-        app.config[key] = overrides[key]
\ No newline at end of file
+        app.config[key] = overrides[key]
+    configure_database(app.config)
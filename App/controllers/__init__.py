@@ -5,4 +5,10 @@ from .student import *
 from .staff import *
 from .hour_log import *
 from .accolade import *
-
+from .leaderboard import *
+from .imports import *
+from .hour_import import *
+from .user_import import *
+from .report import *
+from .student_stats import *
+from .hour_rollup import *
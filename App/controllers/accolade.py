@@ -1,20 +1,89 @@
+from datetime import datetime
+
 from App.models.accolade import Accolade
+from App.models.milestone import Milestone, milestones_between, invalidate_milestone_cache
+from App.models.student import Student
 from App.database import db
 
+
 def award_accolades(student):
+    # Awards any milestone the student's total has reached but they don't hold yet
 
-    milestones = [10, 20, 50]
     earned = []
 
     for accolade in student.accolades:
         earned.append(accolade.milestone)
 
     new_accs = []
-
-    for m in milestones:
-        if student.total_hours >= m and m not in earned:
+    for m in milestones_between(0, student.total_hours):
+        if m not in earned:
             acc = Accolade(milestone=m, student=student)
             db.session.add(acc)
             new_accs.append(acc)
 
-    return new_accs
\ No newline at end of file
+    return new_accs
+
+
+def award_crossed_milestones(student_id, old_hours, new_hours):
+    # Awards the milestones passed when a total moved from old_hours to new_hours.
+    # Totals are changed by atomic increments, so concurrent confirmations for one
+    # student see disjoint (old, new] ranges and each milestone is awarded exactly once.
+    new_accs = []
+
+    for m in milestones_between(old_hours, new_hours):
+        acc = Accolade(milestone=m, student_id=student_id)
+        db.session.add(acc)
+        new_accs.append(acc)
+
+    return new_accs
+
+
+def get_milestones():
+    return db.session.scalars(db.select(Milestone).order_by(Milestone.threshold)).all()
+
+
+def add_milestone(threshold, name, badge=None):
+    # Adding a tier is a data change: students already past it are awarded it in one statement
+    if threshold <= 0 or db.session.get(Milestone, threshold):
+        return None
+
+    milestone = Milestone(threshold=threshold, name=name, badge=badge)
+    db.session.add(milestone)
+    db.session.flush()
+    db.session.execute(
+        db.insert(Accolade).from_select(
+            ['student_id', 'milestone', 'awarded_at'],
+            db.select(Student.id, db.literal(threshold), db.literal(datetime.utcnow()))
+            .where(
+                Student.total_hours >= threshold,
+                Student.id.not_in(db.select(Accolade.student_id).where(Accolade.milestone == threshold))
+            )
+        )
+    )
+    db.session.commit()
+    invalidate_milestone_cache()
+    return milestone
+
+
+def update_milestone(threshold, name=None, badge=None):
+    milestone = db.session.get(Milestone, threshold)
+    if not milestone:
+        return None
+    if name is not None:
+        milestone.name = name
+    if badge is not None:
+        milestone.badge = badge
+    db.session.commit()
+    invalidate_milestone_cache()
+    return milestone
+
+
+def remove_milestone(threshold):
+    # Stops the tier being awarded; accolades already earned are kept
+    milestone = db.session.get(Milestone, threshold)
+    if not milestone:
+        return False
+    db.session.delete(milestone)
+    db.session.commit()
+    invalidate_milestone_cache()
+    return True
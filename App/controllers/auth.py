@@ -1,12 +1,95 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app, request, has_request_context
+from werkzeug.local import LocalProxy
 from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity, verify_jwt_in_request
 
 from App.models import User
 from App.database import db
 
+
+class CachedIdentity:
+  # What authenticated views need to know about the caller, without a polymorphic User load
+  __slots__ = ('id', 'username', 'role')
+
+  def __init__(self, id, username, role):
+    self.id = id
+    self.username = username
+    self.role = role
+
+  def get_json(self):
+    return {'id': self.id, 'username': self.username, 'role': self.role}
+
+  def __repr__(self):
+    return f'Identity: {self.username}, Role: {self.role}'
+
+
+# Cross-request cache of user id -> CachedIdentity, shared by the threads of one worker.
+# Entries live for IDENTITY_CACHE_TTL seconds (0 turns the cache off) and are dropped
+# straight away when the user is updated in this process.
+_identity_cache = OrderedDict()
+_identity_cache_lock = Lock()
+
+
+def _request_identities():
+  # Kept in the WSGI environ rather than g because g outlives the request while
+  # create_app's pushed app context is active
+  if not has_request_context():
+    return {}
+  return request.environ.setdefault('app.identities', {})
+
+
+def cached_identity(user_id):
+  # The identity in the TTL cache, or None when it isn't there or has expired
+  with _identity_cache_lock:
+    cached = _identity_cache.get(user_id)
+  if cached and cached[0] > time.monotonic():
+    return cached[1]
+  return None
+
+
+def cache_identity(identity):
+  ttl = current_app.config.get('IDENTITY_CACHE_TTL', 60)
+  if identity is None or ttl <= 0:
+    return
+  with _identity_cache_lock:
+    _identity_cache[identity.id] = (time.monotonic() + ttl, identity)
+    _identity_cache.move_to_end(identity.id)
+    while len(_identity_cache) > current_app.config.get('IDENTITY_CACHE_SIZE', 10000):
+      _identity_cache.popitem(last=False)
+
+
+def get_identity(user_id):
+  # Request-scoped first, then the TTL cache, then one (id, username, role) query
+  identities = _request_identities()
+  if user_id in identities:
+    return identities[user_id]
+
+  identity = cached_identity(user_id)
+  if identity is None:
+    row = db.session.execute(db.select(User.id, User.username, User.role).where(User.id == user_id)).first()
+    identity = CachedIdentity(row.id, row.username, row.role) if row else None
+    cache_identity(identity)
+  identities[user_id] = identity
+  return identity
+
+
+def invalidate_identity(user_id):
+  _request_identities().pop(user_id, None)
+  with _identity_cache_lock:
+    _identity_cache.pop(user_id, None)
+
+
 def login(username, password):
   result = db.session.execute(db.select(User).filter_by(username=username))
   user = result.scalar_one_or_none()
   if user and user.check_password(password):
+    # Upgrade hashes made with older PASSWORD_HASH_METHOD settings while we have the password
+    if user.password_needs_rehash():
+      user.set_password(password)
+      db.session.commit()
     # Store ONLY the user id as a string in JWT 'sub'
     return create_access_token(identity=str(user.id))
   return None
@@ -30,23 +113,36 @@ def setup_jwt(app):
       user_id = int(identity)
     except (TypeError, ValueError):
       return None
-    return db.session.get(User, user_id)
+    identity = get_identity(user_id)
+    # Lets templates reuse the user this request has already resolved
+    if has_request_context():
+      request.environ['app.current_identity'] = identity
+    return identity
 
   return jwt
 
 
+def _template_identity():
+  # Resolved at most once per request, and only if a template reads current_user or
+  # is_authenticated. Reuses the identity loaded by @jwt_required when there was one.
+  if not has_request_context():
+    return None
+  environ = request.environ
+  if 'app.current_identity' not in environ:
+    try:
+      verify_jwt_in_request(optional=True)
+    except Exception:
+      # Expired or malformed tokens just render the anonymous page
+      pass
+    environ.setdefault('app.current_identity', None)
+  return environ['app.current_identity']
+
+
 # Context processor to make 'is_authenticated' available to all templates
 def add_auth_context(app):
+  current_user = LocalProxy(_template_identity)
+  is_authenticated = LocalProxy(lambda: _template_identity() is not None)
+
   @app.context_processor
   def inject_user():
-      try:
-          verify_jwt_in_request()
-          identity = get_jwt_identity()
-          user_id = int(identity) if identity is not None else None
-          current_user = db.session.get(User, user_id) if user_id is not None else None
-          is_authenticated = current_user is not None
-      except Exception as e:
-          print(e)
-          is_authenticated = False
-          current_user = None
-      return dict(is_authenticated=is_authenticated, current_user=current_user)
\ No newline at end of file
+      return dict(is_authenticated=is_authenticated, current_user=current_user)
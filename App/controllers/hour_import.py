@@ -0,0 +1,148 @@
+import codecs, csv, json, os
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import or_
+
+from App.models import Staff, Student, HourLog
+from App.controllers.staff import apply_confirmed_hours
+from App.controllers.student_stats import record_new_logs
+from App.controllers.hour_rollup import record_confirmed_rollups
+from App.controllers.imports import add_import_error
+from App.database import db
+
+
+def hour_sheet_format(filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    raise ValueError(f"Unsupported hour sheet type '{extension}', expected .csv or .jsonl")
+
+
+def read_hour_sheet(stream, fmt):
+    # Yields (line number, row) one at a time so the whole file is never held in memory.
+    # Rows are dicts with 'hours' and either 'student_id' or 'student' (a username).
+    if fmt == 'csv':
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, row
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, None
+
+
+def import_hours_file(staff_id, path, chunk_size=500, dry_run=False):
+    fmt = hour_sheet_format(path)
+    _check_utf8(path)
+    with open(path, newline='', encoding='utf-8-sig') as stream:
+        return import_hours(staff_id, read_hour_sheet(stream, fmt), chunk_size, dry_run)
+
+
+def import_hours(staff_id, rows, chunk_size=500, dry_run=False):
+    # Logs confirmed hours for every valid row, chunk_size rows per transaction.
+    # Returns a summary with the rows imported and the errors found, or None if
+    # the staff member doesn't exist. A dry run validates everything but writes nothing.
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    staff = Staff.query.get(staff_id)
+    if not staff:
+        return None
+
+    summary = {'dry_run': dry_run, 'imported': 0, 'hours': 0, 'error_count': 0, 'errors': []}
+    rows = iter(rows)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        _import_chunk(staff, chunk, summary, dry_run)
+
+    return summary
+
+
+def _import_chunk(staff, chunk, summary, dry_run):
+    parsed = []
+    for line_no, row in chunk:
+        if not isinstance(row, dict):
+            add_import_error(summary, line_no, "Row could not be parsed")
+            continue
+        hours = _positive_int(row.get('hours'))
+        student_id = _positive_int(row.get('student_id'))
+        username = str(row.get('student') or row.get('username') or '').strip()
+        if hours is None:
+            add_import_error(summary, line_no, "hours must be a positive whole number")
+        elif student_id is None and not username:
+            add_import_error(summary, line_no, "Row needs a student_id or student username")
+        else:
+            parsed.append((line_no, student_id, username, hours))
+
+    ids = {student_id for _, student_id, _, _ in parsed if student_id}
+    usernames = {username for _, student_id, username, _ in parsed if not student_id}
+    found = db.session.execute(
+        db.select(Student.id, Student.username).where(or_(Student.id.in_(ids), Student.username.in_(usernames)))
+    ).all() if parsed else []
+    known_ids = {row.id for row in found}
+    ids_by_username = {row.username: row.id for row in found}
+
+    logged_at = datetime.utcnow()
+    logs = []
+    hours_by_student = defaultdict(int)
+    logs_by_student = defaultdict(int)
+
+    for line_no, student_id, username, hours in parsed:
+        student_id = student_id if student_id else ids_by_username.get(username)
+        if student_id not in known_ids:
+            add_import_error(summary, line_no, f"Unknown student {student_id or username}")
+            continue
+        logs.append({
+            'student_id': student_id,
+            'staff_id': staff.id,
+            'hours': hours,
+            'status': "confirmed",
+            'created_at': logged_at,
+            'reviewed_at': logged_at,
+            'requested': False
+        })
+        hours_by_student[student_id] += hours
+        logs_by_student[student_id] += 1
+
+    summary['imported'] += len(logs)
+    summary['hours'] += sum(hours_by_student.values())
+    if dry_run or not logs:
+        return
+
+    db.session.execute(db.insert(HourLog), logs)
+    apply_confirmed_hours(hours_by_student)
+    record_new_logs("confirmed", hours_by_student, logs_by_student, logged_at, logged_at)
+    record_confirmed_rollups(staff.id, hours_by_student, logs_by_student, logged_at)
+    db.session.commit()
+
+
+def _check_utf8(path):
+    # Decodes the whole file up front, so a bad byte is reported before any chunk is written
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as stream:
+        try:
+            for block in iter(lambda: stream.read(65536), b''):
+                decoder.decode(block)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise ValueError("Hour sheets must be UTF-8 encoded text") from None
+
+
+def _positive_int(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        number = int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
@@ -0,0 +1,144 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import func, literal, union_all
+
+from App.models import HourLog, HourRollup
+from App.database import db, upsert_increment
+
+ROLLUP_GRANULARITIES = ('day', 'week', 'month')
+# Longest span a series may cover, since every period in it is filled in
+MAX_SERIES_DAYS = 3660
+ROLLUP_COUNTERS = ('confirmed_hours', 'confirmed_count', 'request_count')
+# Totals for everyone are spread over this many rows per day, picked by student id, so
+# concurrent writes rarely wait on the same row and a day still reads at most this many
+ROLLUP_ALL_SHARDS = 16
+
+
+def _all_shard(student_id):
+    return student_id % ROLLUP_ALL_SHARDS
+
+
+def _apply_rollups(changes):
+    # changes maps (scope, scope_id, day) to counter increments. Rows are upserted in key
+    # order so concurrent writers take their row locks in the same order. The caller commits.
+    for scope, scope_id, day in sorted(changes):
+        upsert_increment(HourRollup, {'scope': scope, 'scope_id': scope_id, 'day': day}, changes[(scope, scope_id, day)])
+
+
+def record_request_rollup(student_id, requested_at):
+    day = requested_at.date()
+    _apply_rollups({
+        ('student', student_id, day): {'request_count': 1},
+        ('all', _all_shard(student_id), day): {'request_count': 1},
+    })
+
+
+def record_confirmed_rollups(staff_id, hours_by_student, logs_by_student, confirmed_at):
+    day = confirmed_at.date()
+    changes = defaultdict(lambda: defaultdict(int))
+    for student_id, hours in hours_by_student.items():
+        for key in (('student', student_id, day), ('staff', staff_id, day), ('all', _all_shard(student_id), day)):
+            changes[key]['confirmed_hours'] += hours
+            changes[key]['confirmed_count'] += logs_by_student[student_id]
+    _apply_rollups(changes)
+
+
+def _period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(period, granularity):
+    if granularity == 'week':
+        return period + timedelta(weeks=1)
+    if granularity == 'month':
+        return (period + timedelta(days=32)).replace(day=1)
+    return period + timedelta(days=1)
+
+
+def get_hour_series(granularity='day', scope='all', scope_id=0, start=None, end=None):
+    # Reads the daily rollups for one scope between the dates start (inclusive) and end
+    # (exclusive) and sums them into day, week (starting Monday) or month periods.
+    # Periods without activity between the first and last one are filled with zeros, so a
+    # span over MAX_SERIES_DAYS raises ValueError.
+    # Scope 'all' sums the ROLLUP_ALL_SHARDS rows of each day.
+    counters = [HourRollup.__table__.c[counter] for counter in ROLLUP_COUNTERS]
+    if scope == 'all':
+        query = (
+            db.select(HourRollup.day, *[func.sum(column).label(column.name) for column in counters])
+            .where(HourRollup.scope == 'all')
+            .group_by(HourRollup.day)
+        )
+    else:
+        query = db.select(HourRollup.day, *counters).where(HourRollup.scope == scope, HourRollup.scope_id == scope_id)
+    query = query.order_by(HourRollup.day)
+    if start is not None:
+        query = query.where(HourRollup.day >= start)
+    if end is not None:
+        query = query.where(HourRollup.day < end)
+    rows = db.session.execute(query).all()
+
+    totals = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+    for row in rows:
+        period = totals[_period_start(row.day, granularity)]
+        for counter in ROLLUP_COUNTERS:
+            period[counter] += getattr(row, counter)
+
+    first = start if start is not None else (rows[0].day if rows else None)
+    last = end - timedelta(days=1) if end is not None else (rows[-1].day if rows else None)
+    if first is None or last is None or first > last:
+        return []
+    if (last - first).days >= MAX_SERIES_DAYS:
+        raise ValueError(f"Hour series can cover at most {MAX_SERIES_DAYS} days")
+
+    series = []
+    period = _period_start(first, granularity)
+    while period <= last:
+        series.append({'period': period.isoformat(), **totals.get(period, dict.fromkeys(ROLLUP_COUNTERS, 0))})
+        period = _next_period(period, granularity)
+    return series
+
+
+def _rollup_contributions():
+    # What every log adds to the rollups: a request on the day it was created and,
+    # once confirmed, its hours on the day it was reviewed
+    requested = HourLog.requested
+    confirmed = HourLog.status == "confirmed"
+
+    def select(scope, scope_id, day, hours, count, requests, condition):
+        return db.select(
+            literal(scope).label('scope'), scope_id.label('scope_id'), func.date(day).label('day'),
+            hours.label('confirmed_hours'), count.label('confirmed_count'), requests.label('request_count')
+        ).where(condition)
+
+    zero, one = literal(0), literal(1)
+    shard = HourLog.student_id % ROLLUP_ALL_SHARDS
+    return union_all(
+        select('all', shard, HourLog.created_at, zero, zero, one, requested),
+        select('all', shard, HourLog.reviewed_at, HourLog.hours, one, zero, confirmed),
+        select('student', HourLog.student_id, HourLog.created_at, zero, zero, one, requested),
+        select('student', HourLog.student_id, HourLog.reviewed_at, HourLog.hours, one, zero, confirmed),
+        select('staff', HourLog.staff_id, HourLog.reviewed_at, HourLog.hours, one, zero, confirmed & HourLog.staff_id.is_not(None))
+    ).subquery()
+
+
+def rebuild_hour_rollups():
+    contributions = _rollup_contributions()
+    db.session.execute(db.delete(HourRollup))
+    db.session.execute(
+        db.insert(HourRollup).from_select(
+            ['scope', 'scope_id', 'day', *ROLLUP_COUNTERS],
+            db.select(
+                contributions.c.scope, contributions.c.scope_id, contributions.c.day,
+                *[func.sum(contributions.c[counter]) for counter in ROLLUP_COUNTERS]
+            )
+            .where(contributions.c.scope_id.is_not(None))
+            .group_by(contributions.c.scope, contributions.c.scope_id, contributions.c.day)
+        )
+    )
+    db.session.commit()
+    return db.session.scalar(db.select(func.count()).select_from(HourRollup))
@@ -0,0 +1,10 @@
+# Helpers shared by the bulk hour and user imports
+
+MAX_REPORTED_ERRORS = 100
+
+
+def add_import_error(summary, line_no, message):
+    # Counts every bad row but only reports the first MAX_REPORTED_ERRORS of them
+    summary['error_count'] += 1
+    if len(summary['errors']) < MAX_REPORTED_ERRORS:
+        summary['errors'].append({'line': line_no, 'message': message})
@@ -1,6 +1,6 @@
 from App.controllers.staff import log_hours
 from App.controllers.student import request_hours
-from .user import create_user
+from .user_import import create_users_bulk
 from App.database import db
 
 
@@ -10,22 +10,25 @@ def initialize():
 
     # Populating system with existing users
 
-    create_user('alice', 'alicepass', 'student') #ID 1
-    create_user('rob', 'robpass', 'student') #ID 2  
-    create_user('carol', 'carolpass', 'student') #ID 3
-    create_user('dave', 'davepass', 'student') #ID 4
-    create_user('eve', 'evepass', 'student') #ID 5
-    create_user('frank', 'frankpass', 'student') #ID 6
-    create_user('grace', 'gracepass', 'student') #ID 7
-    create_user('heidi', 'heidipass', 'student') #ID 8
-    create_user('ivan', 'ivanpass', 'student') #ID 9
-    create_user('judy', 'judypass', 'student') #ID 10
-
-    create_user('sally', 'sallypass', 'staff') #ID 11
-    create_user('steve', 'stevepass', 'staff') #ID 12
-    create_user('john', 'johnpass', 'staff') #ID 13
-    create_user('laura', 'laurapass', 'staff') #ID 14
-    create_user('mike', 'mikepass', 'staff') #ID 15
+    users = [
+        {'username': 'alice', 'password': 'alicepass', 'role': 'student'}, #ID 1
+        {'username': 'rob', 'password': 'robpass', 'role': 'student'}, #ID 2
+        {'username': 'carol', 'password': 'carolpass', 'role': 'student'}, #ID 3
+        {'username': 'dave', 'password': 'davepass', 'role': 'student'}, #ID 4
+        {'username': 'eve', 'password': 'evepass', 'role': 'student'}, #ID 5
+        {'username': 'frank', 'password': 'frankpass', 'role': 'student'}, #ID 6
+        {'username': 'grace', 'password': 'gracepass', 'role': 'student'}, #ID 7
+        {'username': 'heidi', 'password': 'heidipass', 'role': 'student'}, #ID 8
+        {'username': 'ivan', 'password': 'ivanpass', 'role': 'student'}, #ID 9
+        {'username': 'judy', 'password': 'judypass', 'role': 'student'}, #ID 10
+
+        {'username': 'sally', 'password': 'sallypass', 'role': 'staff'}, #ID 11
+        {'username': 'steve', 'password': 'stevepass', 'role': 'staff'}, #ID 12
+        {'username': 'john', 'password': 'johnpass', 'role': 'staff'}, #ID 13
+        {'username': 'laura', 'password': 'laurapass', 'role': 'staff'}, #ID 14
+        {'username': 'mike', 'password': 'mikepass', 'role': 'staff'}, #ID 15
+    ]
+    create_users_bulk(enumerate(users, start=1))
 
    
     # Populating system with existing hour logs and accolades
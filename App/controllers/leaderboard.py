@@ -0,0 +1,173 @@
+from sqlalchemy import func, and_, or_
+
+from App.models import Student, LeaderboardBucket
+from App.database import db, upsert_increment
+from App.response_cache import invalidate
+
+
+def adjust_leaderboard(old_hours, new_hours):
+    # Moves one student between hour buckets. Pass old_hours=None for a new student.
+    # Runs inside the caller's transaction, so it commits together with total_hours.
+    if old_hours == new_hours:
+        return
+    if old_hours is not None:
+        _bump_bucket(old_hours, -1)
+    if new_hours is not None:
+        _bump_bucket(new_hours, 1)
+
+
+def _bump_bucket(hours, delta):
+    upsert_increment(LeaderboardBucket, {'total_hours': hours}, {'student_count': delta})
+    if delta < 0:
+        db.session.execute(
+            db.delete(LeaderboardBucket)
+            .where(LeaderboardBucket.total_hours == hours, LeaderboardBucket.student_count <= 0)
+        )
+
+
+def rebuild_leaderboard():
+    db.session.execute(db.delete(LeaderboardBucket))
+    counts = db.session.execute(
+        db.select(Student.total_hours, func.count(Student.id)).group_by(Student.total_hours)
+    ).all()
+    db.session.add_all([LeaderboardBucket(total_hours=hours, student_count=count) for hours, count in counts])
+    invalidate('leaderboard')
+    db.session.commit()
+    return len(counts)
+
+
+def ranking_query():
+    return db.select(Student.id, Student.username, Student.total_hours).order_by(
+        Student.total_hours.desc(), Student.id
+    )
+
+
+def ranked_leaderboard_query():
+    # Dense rank of every bucket via a window over leaderboard_buckets, which holds one
+    # row per distinct total, then joined back to students so only the requested slice is read.
+    ranks = db.select(
+        LeaderboardBucket.total_hours,
+        func.row_number().over(order_by=LeaderboardBucket.total_hours.desc()).label('rank')
+    ).subquery()
+    return (
+        db.select(ranks.c.rank, Student.id, Student.username, Student.total_hours)
+        .select_from(Student)
+        .join(ranks, ranks.c.total_hours == Student.total_hours)
+    )
+
+
+def _descending(query):
+    return query.order_by(Student.total_hours.desc(), Student.id)
+
+
+def _ranks_after(hours, student_id):
+    return or_(
+        Student.total_hours < hours,
+        and_(Student.total_hours == hours, Student.id > student_id)
+    )
+
+
+def _ranks_before(hours, student_id):
+    return or_(
+        Student.total_hours > hours,
+        and_(Student.total_hours == hours, Student.id < student_id)
+    )
+
+
+def _rank_for_hours(hours):
+    higher = db.session.scalar(
+        db.select(func.count()).select_from(LeaderboardBucket).where(LeaderboardBucket.total_hours > hours)
+    )
+    return higher + 1
+
+
+def leaderboard_table(rows):
+    # [rank, username, total_hours] with dense ranks, from rows of ranking_query()
+    table = []
+    previous_hours = None
+    rank = 0
+
+    for row in rows:
+        if row.total_hours != previous_hours:
+            rank += 1
+            previous_hours = row.total_hours
+        table.append([rank, row.username, row.total_hours])
+    return table
+
+
+# Query builders shared with the async read API, which runs them on its own engine
+def leaderboard_top_query(n):
+    return _descending(ranked_leaderboard_query()).limit(n)
+
+
+def leaderboard_after_query(cursor, limit):
+    query = ranked_leaderboard_query()
+    if cursor is not None:
+        query = query.where(_ranks_after(*cursor))
+    return _descending(query).limit(limit)
+
+
+def leaderboard_student_query(student_id):
+    return ranked_leaderboard_query().where(Student.id == student_id)
+
+
+def leaderboard_neighbour_queries(student, radius):
+    # The up to `radius` rows ranked just above (nearest first) and just below a student's row
+    above = (
+        ranked_leaderboard_query()
+        .where(_ranks_before(student.total_hours, student.id))
+        .order_by(Student.total_hours, Student.id.desc())
+        .limit(radius)
+    )
+    below = _descending(ranked_leaderboard_query().where(_ranks_after(student.total_hours, student.id))).limit(radius)
+    return above, below
+
+
+def get_leaderboard():
+    return leaderboard_table(db.session.execute(ranking_query()).all())
+
+
+def get_leaderboard_top(n):
+    if n <= 0:
+        return []
+    return db.session.execute(leaderboard_top_query(n)).all()
+
+
+def get_leaderboard_page(page, per_page=20):
+    # OFFSET fallback for jumping straight to a page number: the database still ranks and
+    # skips every row before it. The HTTP and CLI pages use get_leaderboard_after instead.
+    if page < 1 or per_page < 1:
+        return []
+    return db.session.execute(
+        _descending(ranked_leaderboard_query()).limit(per_page).offset((page - 1) * per_page)
+    ).all()
+
+
+def get_leaderboard_after(cursor, limit=20):
+    return db.session.execute(leaderboard_after_query(cursor, limit)).all()
+
+
+def get_leaderboard_around(student_id, radius=5):
+    student = db.session.execute(leaderboard_student_query(student_id)).first()
+    if student is None:
+        return None
+
+    above, below = leaderboard_neighbour_queries(student, radius)
+    return list(reversed(db.session.execute(above).all())) + [student] + db.session.execute(below).all()
+
+
+def get_student_rank(student_id):
+    hours = db.session.scalar(db.select(Student.total_hours).where(Student.id == student_id))
+    if hours is None:
+        return None
+    return _rank_for_hours(hours)
+
+
+def encode_leaderboard_cursor(row):
+    return f"{row.total_hours}:{row.id}"
+
+
+def decode_leaderboard_cursor(cursor):
+    # Raises ValueError for anything that is not "<total_hours>:<student_id>"
+    hours, student_id = cursor.split(':')
+    return int(hours), int(student_id)
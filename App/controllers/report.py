@@ -0,0 +1,174 @@
+import csv, io, json
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, case, and_
+
+from App.models import User, HourLog
+from App.database import db
+
+REPORT_FORMATS = ('ndjson', 'csv')
+REPORT_STATUSES = ('requested', 'confirmed', 'denied')
+HOUR_LOG_REPORT_COLUMNS = ('id', 'student_id', 'student', 'staff_id', 'staff', 'hours', 'status', 'created_at', 'reviewed_at')
+
+REVIEW_PERCENTILES = (50, 90, 95)
+
+# One shared encoder skips json.dumps' per-call setup, which adds up over millions of rows
+_encode_json = json.JSONEncoder().encode
+
+
+def parse_report_date(value, end=False):
+    # Accepts YYYY-MM-DD or a full ISO timestamp. A bare end date covers that whole day,
+    # so it is returned as midnight of the next day for an exclusive upper bound.
+    # Raises ValueError for anything else.
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def hour_log_report_query(start=None, end=None, status=None, staff_id=None):
+    # One row per log with both usernames joined in, as plain tuples in id order.
+    # start is inclusive and end exclusive, both compared against created_at.
+    student = User.__table__.alias('student_user')
+    staff = User.__table__.alias('staff_user')
+    logs = HourLog.__table__
+
+    query = (
+        db.select(
+            logs.c.id, logs.c.student_id, student.c.username.label('student'),
+            logs.c.staff_id, staff.c.username.label('staff'),
+            logs.c.hours, logs.c.status, logs.c.created_at, logs.c.reviewed_at
+        )
+        .select_from(logs)
+        .outerjoin(student, student.c.id == logs.c.student_id)
+        .outerjoin(staff, staff.c.id == logs.c.staff_id)
+        .order_by(logs.c.id)
+    )
+    if start is not None:
+        query = query.where(logs.c.created_at >= start)
+    if end is not None:
+        query = query.where(logs.c.created_at < end)
+    if status is not None:
+        query = query.where(logs.c.status == status)
+    if staff_id is not None:
+        query = query.where(logs.c.staff_id == staff_id)
+    return query
+
+
+def stream_hour_log_report(batch_size=1000, **filters):
+    # Yields lists of up to batch_size rows. yield_per streams from a server-side
+    # cursor where the driver has one, so memory stays flat however many logs match.
+    result = db.session.execute(hour_log_report_query(**filters).execution_options(yield_per=batch_size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def _report_row(row):
+    created_at, reviewed_at = row[7], row[8]
+    return row[:7] + (
+        created_at.isoformat(sep=' ', timespec='seconds') if created_at else None,
+        reviewed_at.isoformat(sep=' ', timespec='seconds') if reviewed_at else None
+    )
+
+
+def export_hour_logs(fmt='ndjson', batch_size=1000, **filters):
+    # Yields the report as text chunks of one batch each, ready to write or stream
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported report format '{fmt}', expected ndjson or csv")
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(HOUR_LOG_REPORT_COLUMNS)
+        yield buffer.getvalue()
+
+    for rows in stream_hour_log_report(batch_size, **filters):
+        if fmt == 'csv':
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(_report_row(row) for row in rows)
+            yield buffer.getvalue()
+        else:
+            yield ''.join(
+                _encode_json(dict(zip(HOUR_LOG_REPORT_COLUMNS, _report_row(row)))) + '\n' for row in rows
+            )
+
+
+def _seconds_between(start, end):
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return func.extract('epoch', end - start)
+    return (func.julianday(end) - func.julianday(start)) * 86400
+
+
+def staff_review_stats_query(start=None, end=None, staff_id=None):
+    # Per-reviewer throughput for logs reviewed in [start, end), grouped in the database.
+    # Turnaround percentiles only cover reviewed requests: hours logged directly by staff
+    # were never waiting and would drag every percentile to zero.
+    # Percentiles use the nearest-rank method, the smallest turnaround whose rank within
+    # the reviewer's requests is at least p% of their count.
+    is_request = HourLog.requested
+    turnaround = _seconds_between(HourLog.created_at, HourLog.reviewed_at)
+
+    reviews = (
+        db.select(
+            HourLog.staff_id, HourLog.status, HourLog.hours,
+            case((is_request, turnaround)).label('turnaround'),
+            func.row_number().over(partition_by=(HourLog.staff_id, is_request), order_by=turnaround).label('position'),
+            func.count(case((is_request, 1))).over(partition_by=HourLog.staff_id).label('requests')
+        )
+        .where(HourLog.staff_id.is_not(None), HourLog.status.in_(("confirmed", "denied")))
+    )
+    if start is not None:
+        reviews = reviews.where(HourLog.reviewed_at >= start)
+    if end is not None:
+        reviews = reviews.where(HourLog.reviewed_at < end)
+    if staff_id is not None:
+        reviews = reviews.where(HourLog.staff_id == staff_id)
+    reviews = reviews.subquery()
+
+    percentiles = [
+        func.min(case((
+            and_(reviews.c.turnaround.is_not(None), reviews.c.position * 100 >= reviews.c.requests * p),
+            reviews.c.turnaround
+        ))).label(f'p{p}_seconds')
+        for p in REVIEW_PERCENTILES
+    ]
+    return (
+        db.select(
+            reviews.c.staff_id, User.username,
+            func.sum(case((reviews.c.status == "confirmed", 1), else_=0)).label('confirmed'),
+            func.sum(case((reviews.c.status == "denied", 1), else_=0)).label('denied'),
+            func.sum(case((reviews.c.status == "confirmed", reviews.c.hours), else_=0)).label('hours_approved'),
+            func.max(reviews.c.requests).label('requests_reviewed'),
+            func.avg(reviews.c.turnaround).label('mean_seconds'),
+            *percentiles
+        )
+        .join(User, User.id == reviews.c.staff_id)
+        .group_by(reviews.c.staff_id, User.username)
+        .order_by(reviews.c.staff_id)
+    )
+
+
+def get_staff_review_stats(start=None, end=None, staff_id=None):
+    return db.session.execute(staff_review_stats_query(start, end, staff_id)).all()
+
+
+def staff_review_stats_json(row):
+    return {
+        'staff_id': row.staff_id,
+        'username': row.username,
+        'confirmed': row.confirmed,
+        'denied': row.denied,
+        'hours_approved': row.hours_approved,
+        'requests_reviewed': row.requests_reviewed,
+        'turnaround_seconds': {
+            'mean': _round_seconds(row.mean_seconds),
+            **{f'p{p}': _round_seconds(getattr(row, f'p{p}_seconds')) for p in REVIEW_PERCENTILES}
+        }
+    }
+
+
+def _round_seconds(value):
+    return round(float(value), 1) if value is not None else None
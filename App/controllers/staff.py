@@ -1,52 +1,192 @@
 from App.models import Staff
 from App.models import Student
 from App.models import HourLog
+from App.models import User
 
-from App.controllers.accolade import award_accolades
+from App.controllers.accolade import award_crossed_milestones
+from App.controllers.leaderboard import adjust_leaderboard
+from App.controllers.student_stats import bump_student_stats, record_reviews
+from App.controllers.hour_rollup import record_confirmed_rollups
 
-from App.database import db
+from App.database import db, begin_write
+from App.response_cache import invalidate
 from datetime import datetime
+from collections import defaultdict
+
+def add_student_hours(student_id, hours):
+    # Increments total_hours in the database (UPDATE ... SET total_hours = total_hours + :hours)
+    # so concurrent confirmations for one student can't overwrite each other, then moves the
+    # student's leaderboard bucket and awards the milestones crossed. Returns the new total.
+    new_total = db.session.execute(
+        db.update(Student)
+        .where(Student.id == student_id)
+        .values(total_hours=Student.total_hours + hours)
+        .returning(Student.total_hours),
+        execution_options={'synchronize_session': 'fetch'}
+    ).scalar_one_or_none()
+    if new_total is None:
+        return None
+
+    adjust_leaderboard(new_total - hours, new_total)
+    award_crossed_milestones(student_id, new_total - hours, new_total)
+    invalidate('leaderboard')
+    return new_total
+
 
 def log_hours(staff_id, student_id, hours):
+    begin_write()
     staff = Staff.query.get(staff_id)
     student = Student.query.get(student_id)
     if staff and student and hours > 0:
-        log = HourLog(hours=hours, student=student, staff=staff, status="confirmed", reviewed_at=datetime.utcnow())
+        logged_at = datetime.utcnow()
+        log = HourLog(hours=hours, student=student, staff=staff, status="confirmed", created_at=logged_at, reviewed_at=logged_at, requested=False)
         db.session.add(log)
-        student.total_hours += hours
-        award_accolades(student)
+        add_student_hours(student.id, hours)
+        bump_student_stats(student.id, {'confirmed_count': 1, 'confirmed_hours': hours},
+                           last_requested_at=logged_at, last_reviewed_at=logged_at)
+        record_confirmed_rollups(staff.id, {student.id: hours}, {student.id: 1}, logged_at)
         db.session.commit()
         return log
+    db.session.rollback()
     return None
 
 
 def get_pending_logs():
     return HourLog.query.filter_by(status="requested").all()
 
+
+def pending_queue_query(newest_first=False):
+    # One joined query returning only the columns the queue shows, instead of
+    # lazy-loading each log's student.
+    query = (
+        db.select(HourLog.id, User.username.label('student'), HourLog.hours, HourLog.status, HourLog.created_at)
+        .join(User, User.id == HourLog.student_id)
+        .where(HourLog.status == "requested")
+    )
+    if newest_first:
+        query = query.order_by(HourLog.created_at.desc(), HourLog.id.desc())
+    else:
+        query = query.order_by(HourLog.created_at, HourLog.id)
+    return query
+
+
+def get_pending_queue(page=None, per_page=50, newest_first=False):
+    # Without a page the whole queue is returned
+    query = pending_queue_query(newest_first)
+    if page is not None:
+        if page < 1 or per_page < 1:
+            raise ValueError("page and per_page must be at least 1")
+        query = query.limit(per_page).offset((page - 1) * per_page)
+    return db.session.execute(query).all()
+
+
+def review_logs(staff_id, log_ids, status):
+    # Moves logs out of "requested" with one conditional UPDATE. Only rows still requested
+    # match, so a log can never be confirmed or denied twice even by concurrent reviewers.
+    # Confirmed hours are added to the students' totals before their stats and rollups change:
+    # every write path locks hour_logs, students, leaderboard_buckets, student_stats, then
+    # hour_rollups, so concurrent writers can't deadlock.
+    # Returns (id, student_id, hours) for the logs this call actually reviewed.
+    reviewed_at = datetime.utcnow()
+    reviewed = db.session.execute(
+        db.update(HourLog)
+        .where(HourLog.id.in_(log_ids), HourLog.status == "requested")
+        .values(status=status, staff_id=staff_id, reviewed_at=reviewed_at)
+        .returning(HourLog.id, HourLog.student_id, HourLog.hours),
+        execution_options={'synchronize_session': 'fetch'}
+    ).all()
+
+    hours_by_student = defaultdict(int)
+    logs_by_student = defaultdict(int)
+    if status == "confirmed":
+        for row in reviewed:
+            hours_by_student[row.student_id] += row.hours
+            logs_by_student[row.student_id] += 1
+        apply_confirmed_hours(hours_by_student)
+
+    record_reviews(reviewed, status, reviewed_at)
+    if hours_by_student:
+        record_confirmed_rollups(staff_id, hours_by_student, logs_by_student, reviewed_at)
+    return reviewed
+
+
 def confirm_hours(staff_id, log_id):
+    begin_write()
     staff = Staff.query.get(staff_id)
-    log = HourLog.query.get(log_id)
-    if log and staff and log.status == "requested":
-        log.status = "confirmed"
-        log.staff = staff
-        log.reviewed_at = datetime.utcnow()
-        log.student.total_hours += log.hours
-        award_accolades(log.student)
-        db.session.commit()
-        return log
-    return None
+    if not staff:
+        db.session.rollback()
+        return None
+
+    if not review_logs(staff.id, [log_id], "confirmed"):
+        db.session.rollback()
+        return None
+
+    db.session.commit()
+    return HourLog.query.get(log_id)
 
 
 def deny_hours(staff_id, log_id):
+    begin_write()
     staff = Staff.query.get(staff_id)
-    log = HourLog.query.get(log_id)
-    if staff and log and log.status == "requested":
-        log.status = "denied"
-        log.staff = staff
-        log.reviewed_at = datetime.utcnow()
-        db.session.commit()
-        return log
-    return None
+    if not staff:
+        db.session.rollback()
+        return None
+
+    if not review_logs(staff.id, [log_id], "denied"):
+        db.session.rollback()
+        return None
+
+    db.session.commit()
+    return HourLog.query.get(log_id)
+
+
+def apply_confirmed_hours(hours_by_student):
+    # Adds each student's newly confirmed hours with one atomic increment per student.
+    # Students are updated in id order so concurrent batches take row locks in the same order.
+    # The caller commits.
+    for student_id in sorted(hours_by_student):
+        add_student_hours(student_id, hours_by_student[student_id])
+
+
+def review_hours_bulk(staff_id, log_ids, status):
+    # Reviews many requests in one transaction: one conditional UPDATE moves every
+    # still-requested log and review_logs changes every student's total once.
+    # Returns one result per distinct log id, or None if the staff member doesn't exist.
+    begin_write()
+    staff = Staff.query.get(staff_id)
+    if not staff:
+        db.session.rollback()
+        return None
+
+    log_ids = list(dict.fromkeys(log_ids))
+    reviewed = {row.id: row for row in review_logs(staff.id, log_ids, status)}
+    skipped = [log_id for log_id in log_ids if log_id not in reviewed]
+    statuses = dict(db.session.execute(
+        db.select(HourLog.id, HourLog.status).where(HourLog.id.in_(skipped))
+    ).all()) if skipped else {}
+
+    results = []
+
+    for log_id in log_ids:
+        log = reviewed.get(log_id)
+        if log:
+            results.append({'id': log_id, 'success': True, 'student_id': log.student_id, 'hours': log.hours, 'status': status})
+        elif log_id in statuses:
+            results.append({'id': log_id, 'success': False, 'message': f"Log already {statuses[log_id]}"})
+        else:
+            results.append({'id': log_id, 'success': False, 'message': "Log not found"})
+
+    db.session.commit()
+    return results
+
+
+def confirm_hours_bulk(staff_id, log_ids):
+    return review_hours_bulk(staff_id, log_ids, "confirmed")
+
+
+def deny_hours_bulk(staff_id, log_ids):
+    return review_hours_bulk(staff_id, log_ids, "denied")
+
 
 def get_staff(staff_id):
     return Staff.query.get(staff_id)
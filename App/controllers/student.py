@@ -1,16 +1,25 @@
-from App.models import Student
-from App.database import db
+from App.models import Student, User
+from App.database import db, begin_write
 from App.models.hour_log import HourLog
+from App.models.accolade import Accolade
+from App.controllers.student_stats import bump_student_stats
+from App.controllers.hour_rollup import record_request_rollup
+from datetime import datetime
 
 
 def request_hours(student_id, hours):
+    begin_write()
     student = get_student(student_id)
 
     if student and hours > 0:
-        log = HourLog(hours=hours, student=student, status ="requested")
+        requested_at = datetime.utcnow()
+        log = HourLog(hours=hours, student=student, status ="requested", created_at=requested_at)
         db.session.add(log)
+        bump_student_stats(student.id, {'pending_count': 1, 'pending_hours': hours}, last_requested_at=requested_at)
+        record_request_rollup(student.id, requested_at)
         db.session.commit()
         return log
+    db.session.rollback()
     return None
 
 
@@ -21,20 +30,39 @@ def get_student_logs(student_id):
     return None
 
 
+def student_log_query(student_id, status=None):
+    # One query for a student's logs with the reviewing staff member's username joined in,
+    # oldest first. Logs not reviewed yet have staff None.
+    query = (
+        db.select(
+            HourLog.id, HourLog.hours, HourLog.status, User.username.label('staff'),
+            HourLog.created_at, HourLog.reviewed_at
+        )
+        .outerjoin(User, User.id == HourLog.staff_id)
+        .where(HourLog.student_id == student_id)
+        .order_by(HourLog.created_at, HourLog.id)
+    )
+    if status is not None:
+        query = query.where(HourLog.status == status)
+    return query
+
+
+def get_student_log_page(student_id, status=None, page=None, per_page=50):
+    # Without a page every matching log is returned
+    query = student_log_query(student_id, status)
+    if page is not None:
+        if page < 1 or per_page < 1:
+            raise ValueError("page and per_page must be at least 1")
+        query = query.limit(per_page).offset((page - 1) * per_page)
+    return db.session.execute(query).all()
+
+
 def get_student_accolades(student_id):
     student = get_student(student_id)
     if student:
-        milestones = [10, 20, 50]
-        result = []
-        for m in milestones:
-            for accolade in student.accolades:
-                if accolade.milestone == m:
-                    result.append(accolade)
-        return result
+        return Accolade.query.filter_by(student_id=student.id).order_by(Accolade.milestone).all()
     return None
 
 
-
-
 def get_student(student_id):
     return Student.query.get(student_id)
\ No newline at end of file
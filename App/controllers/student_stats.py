@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from sqlalchemy import func, case, union
+
+from App.models import HourLog, StudentStats
+from App.database import db, upsert_increment
+
+# Log status -> column prefix in student_stats
+STATS_PREFIXES = {
+    'requested': 'pending',
+    'confirmed': 'confirmed',
+    'denied': 'denied'
+}
+STATS_COLUMNS = (
+    'pending_count', 'pending_hours', 'confirmed_count', 'confirmed_hours',
+    'denied_count', 'denied_hours', 'last_requested_at', 'last_reviewed_at'
+)
+
+
+def bump_student_stats(student_id, increments, last_requested_at=None, last_reviewed_at=None):
+    # Applies count/hour increments, e.g. {'pending_count': 1, 'pending_hours': 5}, to a
+    # student's stats row with one upsert. Runs inside the caller's transaction.
+    latest = {}
+    if last_requested_at is not None:
+        latest['last_requested_at'] = last_requested_at
+    if last_reviewed_at is not None:
+        latest['last_reviewed_at'] = last_reviewed_at
+    upsert_increment(StudentStats, {'student_id': student_id}, increments, latest)
+
+
+def record_new_logs(status, hours_by_student, counts_by_student, logged_at, reviewed_at=None):
+    # For logs just created with `status`, e.g. a request or hours logged by staff
+    prefix = STATS_PREFIXES[status]
+    for student_id in sorted(hours_by_student):
+        bump_student_stats(student_id, {
+            f'{prefix}_count': counts_by_student[student_id],
+            f'{prefix}_hours': hours_by_student[student_id]
+        }, last_requested_at=logged_at, last_reviewed_at=reviewed_at)
+
+
+def record_reviews(reviewed, status, reviewed_at):
+    # Moves (id, student_id, hours) rows that review_logs took out of "requested" to `status`.
+    # Students are updated in id order, like apply_confirmed_hours.
+    changes = defaultdict(lambda: [0, 0])
+    for row in reviewed:
+        changes[row.student_id][0] += 1
+        changes[row.student_id][1] += row.hours
+
+    prefix = STATS_PREFIXES[status]
+    for student_id in sorted(changes):
+        count, hours = changes[student_id]
+        bump_student_stats(student_id, {
+            'pending_count': -count,
+            'pending_hours': -hours,
+            f'{prefix}_count': count,
+            f'{prefix}_hours': hours
+        }, last_reviewed_at=reviewed_at)
+
+
+def get_student_stats(student_id):
+    # A single primary key lookup. Students without any logs get an empty summary.
+    return db.session.get(StudentStats, student_id) or StudentStats(student_id=student_id)
+
+
+def student_stats_query():
+    # Recomputes every student's stats from hour_logs, in student_stats column order
+    columns = []
+    for status, prefix in STATS_PREFIXES.items():
+        columns.append(func.sum(case((HourLog.status == status, 1), else_=0)).label(f'{prefix}_count'))
+        columns.append(func.sum(case((HourLog.status == status, HourLog.hours), else_=0)).label(f'{prefix}_hours'))
+    return (
+        db.select(
+            HourLog.student_id, *columns,
+            func.max(HourLog.created_at).label('last_requested_at'),
+            func.max(HourLog.reviewed_at).label('last_reviewed_at')
+        )
+        .where(HourLog.student_id.is_not(None))
+        .group_by(HourLog.student_id)
+    )
+
+
+def verify_student_stats():
+    # Returns the ids of students whose stored stats differ from their hour logs,
+    # comparing both directions with EXCEPT so the check runs entirely in the database
+    stored = db.select(StudentStats.student_id, *[StudentStats.__table__.c[column] for column in STATS_COLUMNS])
+    computed = student_stats_query()
+    drifted = union(
+        db.select(stored.except_(computed).subquery().c.student_id),
+        db.select(computed.except_(stored).subquery().c.student_id)
+    ).subquery()
+    return sorted(db.session.scalars(db.select(drifted.c.student_id)).all())
+
+
+def rebuild_student_stats():
+    db.session.execute(db.delete(StudentStats))
+    db.session.execute(
+        db.insert(StudentStats).from_select(['student_id', *STATS_COLUMNS], student_stats_query())
+    )
+    db.session.commit()
+    return db.session.scalar(db.select(func.count()).select_from(StudentStats))
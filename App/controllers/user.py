@@ -1,5 +1,8 @@
 from App.models import User, Student, Staff
 from App.database import db
+from App.controllers.leaderboard import adjust_leaderboard
+from App.controllers.auth import invalidate_identity
+from App.response_cache import invalidate
 
 def create_user(username, password, role):
     if role not in ['student', 'staff']:
@@ -16,35 +19,59 @@ def create_user(username, password, role):
         new_user = Staff(username=username, password=password)
 
     db.session.add(new_user)
+    if role == 'student':
+        adjust_leaderboard(None, 0)
+    invalidate('users', 'leaderboard')
     db.session.commit()
     return new_user
 
 
-def list_users(type):
-    if type == "student":
-        return Student.query.all()
-    elif type == "staff":
-        return Staff.query.all()
-    else:
-        return User.query.all()
-    
+def user_directory_query(type="all", prefix=None, after_id=None):
+    # Selects plain (id, username, role) rows from the users table in id order, without
+    # loading the student/staff subclasses. type uses ix_users_role_id, and prefix is a
+    # case-sensitive range in byte order: the unique username index on SQLite (LIKE would
+    # skip it, matching case-insensitively) and ix_users_username_c on PostgreSQL, whose
+    # default collation would put other strings inside the range.
+    users = User.__table__
+    query = db.select(users.c.id, users.c.username, users.c.role).order_by(users.c.id)
+    if type in ("student", "staff"):
+        query = query.where(users.c.role == type)
+    if prefix:
+        username = users.c.username.collate('C') if db.engine.dialect.name == 'postgresql' else users.c.username
+        query = query.where(username >= prefix)
+        upper = _prefix_upper_bound(prefix)
+        if upper is not None:
+            query = query.where(username < upper)
+    if after_id is not None:
+        query = query.where(users.c.id > after_id)
+    return query
+
+
+def _prefix_upper_bound(prefix):
+    # The smallest string after every string that starts with prefix, e.g. "ab" -> "ac",
+    # or None when nothing can follow it (the prefix is all U+10FFFF). Surrogates can't be
+    # stored, so U+D7FF is followed by U+E000.
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    following = ord(prefix[-1]) + 1
+    return prefix[:-1] + chr(0xE000 if following == 0xD800 else following)
 
 
-def get_leaderboard():
-    students = Student.query.order_by(Student.total_hours.desc()).all()
-    table = []
-    previous_hours = None
-    rank = 0
+def list_users(type="all", prefix=None, after_id=None, limit=None):
+    query = user_directory_query(type, prefix, after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return db.session.execute(query).all()
 
-    for student in students:
-        if student.total_hours != previous_hours:
-            rank += 1
-            previous_hours = student.total_hours
-        table.append([rank, student.username, student.total_hours])
-    return table
 
+def user_json(row):
+    return {
+        'id': row.id,
+        'username': row.username,
+        'role': row.role
+    }
 
-   
 
 def get_user_by_username(username):
     result = db.session.execute(db.select(User).filter_by(username=username))
@@ -57,17 +84,24 @@ def get_all_users():
     return db.session.scalars(db.select(User)).all()
 
 def get_all_users_json():
-    users = get_all_users()
-    if not users:
-        return []
-    users = [user.get_json() for user in users]
-    return users
+    return [user_json(row) for row in list_users()]
 
 def update_user(id, username):
     user = get_user(id)
     if user:
         user.username = username
         # user is already in the session; no need to re-add
+        invalidate('users', 'leaderboard')
+        db.session.commit()
+        invalidate_identity(user.id)
+        return True
+    return None
+
+def update_password(id, password):
+    user = get_user(id)
+    if user:
+        user.set_password(password)
         db.session.commit()
+        invalidate_identity(user.id)
         return True
     return None
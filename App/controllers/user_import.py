@@ -0,0 +1,116 @@
+import csv
+from itertools import islice
+
+from App.models import User, Student, Staff, LeaderboardBucket
+from App.database import db, dialect_insert, upsert_increment
+from App.hashing import bulk_hashing_pool, hash_passwords
+from App.response_cache import invalidate
+from App.controllers.imports import add_import_error
+
+USER_ROLES = ('student', 'staff')
+MAX_USERNAME_LENGTH = 20
+
+
+def read_users_csv(stream):
+    # Yields (line number, row) for a CSV with username, password and optional role columns
+    for line_no, row in enumerate(csv.DictReader(stream), start=2):
+        yield line_no, row
+
+
+def import_users_file(path, chunk_size=1000):
+    with open(path, newline='', encoding='utf-8-sig') as stream:
+        return create_users_bulk(read_users_csv(stream), chunk_size)
+
+
+def create_users_bulk(rows, chunk_size=1000):
+    # Creates a user for every valid (line number, row) pair, chunk_size rows per transaction.
+    # Rows are dicts with username, password and an optional role (default: student).
+    # Invalid and duplicate rows are reported in the summary instead of stopping the import.
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    summary = {'created': 0, 'students': 0, 'staff': 0, 'error_count': 0, 'errors': [], 'users': []}
+    seen = set()
+    rows = iter(rows)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        _create_users_chunk(chunk, seen, summary)
+
+    return summary
+
+
+def _create_users_chunk(chunk, seen, summary):
+    parsed = []
+    for line_no, row in chunk:
+        if not isinstance(row, dict):
+            add_import_error(summary, line_no, "Row could not be parsed")
+            continue
+        username = str(row.get('username') or '').strip()
+        password = str(row.get('password') or '')
+        role = str(row.get('role') or 'student').strip().lower()
+        if not username or len(username) > MAX_USERNAME_LENGTH:
+            add_import_error(summary, line_no, f"username must be 1 to {MAX_USERNAME_LENGTH} characters")
+        elif not password:
+            add_import_error(summary, line_no, "password is required")
+        elif role not in USER_ROLES:
+            add_import_error(summary, line_no, "role must be 'student' or 'staff'")
+        elif username in seen:
+            add_import_error(summary, line_no, f"Duplicate username {username} in this import")
+        else:
+            seen.add(username)
+            parsed.append((line_no, username, password, role))
+
+    # One lookup for the whole chunk, so taken usernames are never hashed
+    existing = set(db.session.scalars(
+        db.select(User.username).where(User.username.in_([username for _, username, _, _ in parsed]))
+    )) if parsed else set()
+
+    new_users = []
+    for line_no, username, password, role in parsed:
+        if username in existing:
+            add_import_error(summary, line_no, f"Username {username} already exists")
+        else:
+            new_users.append((line_no, username, password, role))
+    if not new_users:
+        return
+
+    with bulk_hashing_pool(len(new_users)) as pool:
+        hashes = hash_passwords([password for _, _, password, _ in new_users], pool)
+
+    # Core inserts keep users and the students/staff rows to one multi-row statement each.
+    # ON CONFLICT covers usernames taken by another writer since the lookup above.
+    created = db.session.execute(
+        dialect_insert(User.__table__).on_conflict_do_nothing(index_elements=['username'])
+        .returning(User.__table__.c.id, User.__table__.c.username),
+        [
+            {'username': username, 'password': password_hash, 'role': role}
+            for (_, username, _, role), password_hash in zip(new_users, hashes)
+        ]
+    ).all()
+    ids = {row.username: row.id for row in created}
+
+    students, staff = [], []
+    for line_no, username, _, role in new_users:
+        user_id = ids.get(username)
+        if user_id is None:
+            add_import_error(summary, line_no, f"Username {username} already exists")
+            continue
+        if role == 'student':
+            students.append({'id': user_id, 'total_hours': 0})
+        else:
+            staff.append({'id': user_id})
+        summary['users'].append({'id': user_id, 'username': username, 'role': role})
+
+    if students:
+        db.session.execute(db.insert(Student.__table__), students)
+        upsert_increment(LeaderboardBucket, {'total_hours': 0}, {'student_count': len(students)})
+    if staff:
+        db.session.execute(db.insert(Staff.__table__), staff)
+    invalidate('users', 'leaderboard')
+    db.session.commit()
+
+    summary['created'] += len(students) + len(staff)
+    summary['students'] += len(students)
+    summary['staff'] += len(staff)
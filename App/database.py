@@ -1,14 +1,175 @@
+import time
+from threading import Lock
+
+from flask import has_app_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import case, event, or_, exc
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.pool import QueuePool
 
 
 db = SQLAlchemy()
 
 def get_migrate(app):
-    return Migrate(app, db)
+    return Migrate(app, db, render_as_batch=True)
 
 def create_db():
     db.create_all()
     
 def init_db(app):
-    db.init_app(app)
\ No newline at end of file
+    db.init_app(app)
+    if app.config.get('SQLITE_TUNED') and str(app.config.get('SQLALCHEMY_DATABASE_URI', '')).startswith('sqlite'):
+        with app.app_context():
+            tune_sqlite(db.engine, app.config)
+
+def dispose_engines(app):
+    # Drops the pooled connections a forked worker inherited without closing them, so the
+    # worker opens its own instead of sharing the parent's sockets
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+# Process-wide connection checkout counters, for /metrics
+_pool_stats = {'checkouts': 0, 'checkout_wait_seconds': 0.0, 'max_checkout_wait_seconds': 0.0, 'checkout_timeouts': 0}
+_pool_stats_lock = Lock()
+
+
+def _record_checkout(waited, timed_out=False):
+    with _pool_stats_lock:
+        if timed_out:
+            _pool_stats['checkout_timeouts'] += 1
+        else:
+            _pool_stats['checkouts'] += 1
+        _pool_stats['checkout_wait_seconds'] += waited
+        _pool_stats['max_checkout_wait_seconds'] = max(_pool_stats['max_checkout_wait_seconds'], waited)
+
+
+class MeteredQueuePool(QueuePool):
+    # QueuePool that times how long each checkout waited for a free (or new) connection
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            _record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        _record_checkout(time.perf_counter() - start)
+        return connection
+
+
+def pool_stats():
+    # Checkout counters plus, inside an app context, the current pool's size and usage
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+    pool = db.engine.pool if has_app_context() else None
+    if isinstance(pool, QueuePool):
+        stats.update(pool_size=pool.size(), checked_out=pool.checkedout(), overflow=max(pool.overflow(), 0))
+    return stats
+
+_WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'CREATE', 'DROP', 'ALTER')
+
+
+def tune_sqlite(engine, config):
+    # Applies the SQLITE_* pragmas to every new connection and takes over BEGIN from pysqlite.
+    # Like pysqlite, reads before a transaction's first write run outside of it, but the write
+    # then starts it with BEGIN IMMEDIATE. A session that called begin_write() takes the
+    # write lock before its first statement, read or write.
+    pragmas = (
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}",
+        f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}",
+    )
+
+    def connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    event.listen(engine, 'connect', connect)
+    event.listen(engine, 'begin', _defer_begin)
+    event.listen(engine, 'before_cursor_execute', _emit_begin)
+    event.listen(engine, 'commit', _end_transaction)
+    event.listen(engine, 'rollback', _end_transaction)
+
+
+def _defer_begin(conn):
+    # While this key is set no BEGIN has been sent; True means send it before any statement
+    conn.info['sqlite_begin'] = False
+
+
+def _emit_begin(conn, cursor, statement, parameters, context, executemany):
+    immediate = conn.info.get('sqlite_begin')
+    if immediate is None:
+        return
+    if immediate or statement.lstrip().upper().startswith(_WRITE_PREFIXES):
+        cursor.execute("BEGIN IMMEDIATE")
+        del conn.info['sqlite_begin']
+
+
+def _end_transaction(conn):
+    conn.info.pop('sqlite_begin', None)
+
+
+@event.listens_for(db.session, 'after_begin')
+def _begin_write_transaction(session, transaction, connection):
+    if session.info.pop('write_intent', False) and 'sqlite_begin' in connection.info:
+        connection.info['sqlite_begin'] = True
+
+
+def begin_write():
+    # Write paths that read before they write call this first. Under the tuned SQLite profile
+    # their reads and writes then run in one BEGIN IMMEDIATE transaction, which waits for the
+    # write lock up front instead of acting on reads another writer has since changed.
+    # Elsewhere this does nothing.
+    session = db.session()
+    if not session.in_transaction():
+        session.info['write_intent'] = True
+        return
+    connection = session.connection()
+    if 'sqlite_begin' in connection.info:
+        connection.info['sqlite_begin'] = True
+
+
+def explain(statement):
+    # Returns the database's query plan for a select() as a list of text lines
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    if db.engine.dialect.name == 'sqlite':
+        rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return [row[-1] for row in rows]
+    rows = db.session.execute(db.text(f"EXPLAIN {sql}")).all()
+    return [row[0] for row in rows]
+
+
+# INSERT constructs with ON CONFLICT support, for every database the app runs on.
+# configure_database rejects any other database when the app is created.
+DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def dialect_insert(table):
+    # INSERT construct with ON CONFLICT support for the database in use
+    return DIALECT_INSERTS[db.session.get_bind().dialect.name](table)
+
+
+def upsert_increment(model, keys, increments, latest=None):
+    # Adds `increments` to the row identified by `keys`, creating it if it doesn't exist,
+    # as one INSERT ... ON CONFLICT DO UPDATE so concurrent writers never lose a change.
+    # Columns in `latest` keep whichever is greater, the stored value or the given one.
+    table = model.__table__
+    latest = latest or {}
+    statement = dialect_insert(table).values(**keys, **increments, **latest)
+    changes = {column: table.c[column] + statement.excluded[column] for column in increments}
+    changes.update({
+        column: case(
+            (or_(table.c[column].is_(None), statement.excluded[column] > table.c[column]), statement.excluded[column]),
+            else_=table.c[column]
+        )
+        for column in latest
+    })
+    db.session.execute(statement.on_conflict_do_update(index_elements=list(keys), set_=changes))
@@ -0,0 +1,28 @@
+def gevent_patched():
+    # True inside a gunicorn gevent worker, which runs gevent.monkey.patch_all() before
+    # loading the app, or anywhere else the standard library was patched
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def cooperative_database_driver(app):
+    # psycopg2 blocks the whole worker while it waits on PostgreSQL unless psycogreen hands
+    # the wait to gevent. sqlite3 calls can't be made cooperative; they are local and short.
+    if not gevent_patched() or not str(app.config.get('SQLALCHEMY_DATABASE_URI', '')).startswith('postgresql'):
+        return
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+
+def real_thread_pool(workers, thread_name_prefix):
+    # Under gevent, concurrent.futures threads are greenlets, so CPU work run on them would
+    # still block the hub. gevent's own pool runs it on OS threads instead.
+    if gevent_patched():
+        from gevent.threadpool import ThreadPoolExecutor
+        return ThreadPoolExecutor(workers)
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(workers, thread_name_prefix=thread_name_prefix)
+
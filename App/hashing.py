@@ -0,0 +1,99 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from threading import BoundedSemaphore, Lock
+
+from flask import current_app, has_app_context, has_request_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from App.gevent_support import real_thread_pool
+
+DEFAULT_HASH_METHOD = "scrypt"
+
+
+class HashingBusy(Exception):
+    # Raised when PASSWORD_HASH_MAX_CONCURRENT hashes are already running or queued
+    pass
+
+
+# Password hashing is CPU heavy, so it runs on a small thread pool (hashlib releases the GIL)
+# behind a semaphore that caps how many hashes may be in flight. Requests over the cap wait
+# PASSWORD_HASH_QUEUE_TIMEOUT seconds for a slot and then fail with HashingBusy (a 503).
+_pool = None
+_pool_lock = Lock()
+
+
+def _get_pool():
+    global _pool
+    workers = current_app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+    max_concurrent = current_app.config.get('PASSWORD_HASH_MAX_CONCURRENT', workers * 4)
+    with _pool_lock:
+        if _pool is None or _pool[0] != (workers, max_concurrent):
+            if _pool is not None:
+                _pool[1].shutdown(wait=False)
+            _pool = ((workers, max_concurrent), real_thread_pool(workers, 'hashing'), BoundedSemaphore(max_concurrent))
+        return _pool[1], _pool[2]
+
+
+def _run(fn, *args):
+    if not has_app_context():
+        return fn(*args)
+
+    executor, slots = _get_pool()
+    if not slots.acquire(timeout=current_app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', 1.0)):
+        raise HashingBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_method():
+    if has_app_context():
+        return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+    return DEFAULT_HASH_METHOD
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+
+def bulk_hashing_pool(count):
+    # A process pool for hashing `count` passwords at once, used as a context manager.
+    # Only CLI imports get one: during a request the batch takes a single slot of the
+    # hashing limiter instead. Batches under PASSWORD_HASH_PROCESS_MIN aren't worth
+    # starting processes for.
+    if has_request_context() or count < current_app.config.get('PASSWORD_HASH_PROCESS_MIN', 64):
+        return nullcontext()
+    return ProcessPoolExecutor(_hash_processes())
+
+
+def _hash_processes():
+    return current_app.config.get('PASSWORD_HASH_PROCESSES') or os.cpu_count() or 1
+
+
+def _hash_all(passwords, method):
+    return [generate_password_hash(password, method) for password in passwords]
+
+
+def hash_passwords(passwords, pool=None):
+    method = hash_method()
+    if pool is None:
+        return _run(_hash_all, passwords, method)
+    chunksize = max(1, len(passwords) // (_hash_processes() * 4))
+    return list(pool.map(generate_password_hash, passwords, [method] * len(passwords), chunksize=chunksize))
+
+
+@lru_cache(maxsize=8)
+def _stored_prefix(method):
+    # Werkzeug fills in default parameters, e.g. "scrypt" is stored as "scrypt:32768:8:1"
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def needs_rehash(password_hash):
+    return password_hash.split("$", 1)[0] != _stored_prefix(hash_method())
@@ -1,12 +1,16 @@
 import os
-from flask import Flask, render_template
-from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
+from flask import Flask, render_template, jsonify, request, flash, redirect, url_for
+from flask_uploads import configure_uploads
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from werkzeug.datastructures import  FileStorage
 
 from App.database import init_db
 from App.config import load_config
+from App.hashing import HashingBusy
+from App.profiling import init_profiling
+from App.gevent_support import cooperative_database_driver
+from App.upload_sets import photos, hour_sheets
 
 
 from App.controllers import (
@@ -14,7 +18,7 @@ from App.controllers import (
     add_auth_context
 )
 
-from App.views import views, setup_admin
+from App.views import views, setup_admin, metrics_views
 
 
 
@@ -27,15 +31,32 @@ def create_app(overrides={}):
     load_config(app, overrides)
     CORS(app)
     add_auth_context(app)
-    photos = UploadSet('photos', TEXT + DOCUMENTS + IMAGES)
-    configure_uploads(app, photos)
+    configure_uploads(app, (photos, hour_sheets))
     add_views(app)
     init_db(app)
+    cooperative_database_driver(app)
+    init_profiling(app)
+    # /metrics and /metrics/profile exist only while profiling, behind staff or METRICS_TOKEN auth
+    if app.config.get('PROFILING_ENABLED', False):
+        app.register_blueprint(metrics_views)
     jwt = setup_jwt(app)
     setup_admin(app)
     @jwt.invalid_token_loader
     @jwt.unauthorized_loader
     def custom_unauthorized_response(error):
         return render_template('401.html', error=error), 401
-    app.app_context().push()
+    @app.errorhandler(HashingBusy)
+    def hashing_busy_response(error):
+        message = "Too many logins in progress, please try again shortly"
+        # Browsers posting the login form go back to the page they came from, like a failed login
+        if request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'text/html':
+            flash(message)
+            return redirect(request.referrer or url_for('index_views.index_page'))
+        response = jsonify(message=message)
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    # The CLI and tests rely on this context; servers set PUSH_APP_CONTEXT=False so every
+    # request gets its own context and database session
+    if app.config.get('PUSH_APP_CONTEXT', True):
+        app.app_context().push()
     return app
\ No newline at end of file
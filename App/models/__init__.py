@@ -3,3 +3,7 @@ from .student import *
 from .staff import *
 from .hour_log import *
 from .accolade import *
+from .leaderboard import *
+from .milestone import *
+from .student_stats import *
+from .hour_rollup import *
@@ -1,9 +1,13 @@
 from App.database import db
+from App.models.milestone import find_milestone
 from datetime import datetime
 
 
 class Accolade(db.Model):
     __tablename__ = 'accolades'
+    __table_args__ = (
+        db.Index('uq_accolades_student_id_milestone', 'student_id', 'milestone', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'))
 
@@ -30,14 +34,10 @@ class Accolade(db.Model):
         return None
     
     def milestone_name(self):
-        if self.milestone == 10:
-            return "Bronze"
-        elif self.milestone == 20:
-            return "Silver"
-        elif self.milestone == 50:
-            return "Gold"
-        else:
-            return f"{self.milestone} hours"
+        milestone = find_milestone(self.milestone)
+        if milestone:
+            return milestone.name
+        return f"{self.milestone} hours"
 
 
 
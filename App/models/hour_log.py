@@ -2,8 +2,20 @@ from App.database import db
 from datetime import datetime
 
 
+def format_log_time(value, default=None):
+    if value:
+        return value.strftime("%Y-%m-%d %H:%M")
+    return default
+
+
 class HourLog(db.Model):
     __tablename__ = 'hour_logs'
+    __table_args__ = (
+        db.Index('ix_hour_logs_status_created_at', 'status', 'created_at'),
+        db.Index('ix_hour_logs_student_id_created_at', 'student_id', 'created_at'),
+        db.Index('ix_hour_logs_staff_id_reviewed_at', 'staff_id', 'reviewed_at'),
+        db.Index('ix_hour_logs_reviewed_at', 'reviewed_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'))
@@ -13,6 +25,7 @@ class HourLog(db.Model):
     status = db.Column(db.String(20), default="requested")  # requested/confirmed/denied
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     reviewed_at = db.Column(db.DateTime, nullable=True)
+    requested = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())  # False for hours logged directly by staff
 
     student = db.relationship("Student", backref="logs")
     staff = db.relationship("Staff", backref="created_logs")
@@ -32,12 +45,8 @@ class HourLog(db.Model):
         }
     
     def format_created_time(self):
-        if self.created_at:
-            return self.created_at.strftime("%Y-%m-%d %H:%M")
-        return None
+        return format_log_time(self.created_at)
 
     def format_reviewed_time(self):
-        if self.reviewed_at:
-            return self.reviewed_at.strftime("%Y-%m-%d %H:%M")
-        return "Not reviewed yet"
+        return format_log_time(self.reviewed_at, "Not reviewed yet")
 
@@ -0,0 +1,22 @@
+from App.database import db
+
+
+class HourRollup(db.Model):
+    # Hours confirmed and requests made per UTC day for each student, for each reviewing
+    # staff member and for everyone (split over ROLLUP_ALL_SHARDS rows). Write paths update
+    # it in the same transaction as the logs, so time series read a row or a few per day
+    # instead of every log.
+    __tablename__ = 'hour_rollups'
+    __table_args__ = (
+        db.Index('ix_hour_rollups_scope_day', 'scope', 'day'),
+    )
+
+    scope = db.Column(db.String(10), primary_key=True)
+    scope_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    day = db.Column(db.Date, primary_key=True)
+    confirmed_hours = db.Column(db.Integer, nullable=False, default=0)
+    confirmed_count = db.Column(db.Integer, nullable=False, default=0)
+    request_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<HourRollup {self.scope} {self.scope_id} {self.day} - {self.confirmed_hours} hours, {self.request_count} requests>"
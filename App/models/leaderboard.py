@@ -0,0 +1,13 @@
+from App.database import db
+
+
+class LeaderboardBucket(db.Model):
+    # One row per distinct total_hours value held by at least one student.
+    # A student's dense rank is the number of buckets above their hours + 1.
+    __tablename__ = 'leaderboard_buckets'
+
+    total_hours = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    student_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<LeaderboardBucket {self.total_hours} hours - {self.student_count} students>"
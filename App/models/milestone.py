@@ -0,0 +1,71 @@
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import event
+
+from App.database import db
+
+DEFAULT_MILESTONES = [(10, "Bronze"), (20, "Silver"), (50, "Gold")]
+
+
+class Milestone(db.Model):
+    __tablename__ = 'milestones'
+
+    threshold = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(50), nullable=False)
+    badge = db.Column(db.JSON, nullable=True)  # optional display metadata e.g. {"icon": ..., "colour": ...}
+
+    def __repr__(self):
+        return f"<Milestone {self.threshold} hours - {self.name}>"
+
+    def get_json(self):
+        return {
+            'threshold': self.threshold,
+            'name': self.name,
+            'badge': self.badge
+        }
+
+
+@event.listens_for(Milestone.__table__, 'after_create')
+def seed_default_milestones(target, connection, **kw):
+    connection.execute(target.insert(), [{'threshold': t, 'name': name} for t, name in DEFAULT_MILESTONES])
+
+
+# In-process copy of the milestones table for names and badges. Local changes call
+# invalidate_milestone_cache(); other processes pick them up after MILESTONE_CACHE_TTL
+# seconds, so awarding reads thresholds from the database instead of this copy.
+MilestoneTable = namedtuple('MilestoneTable', ['loaded_at', 'milestones'])
+_milestone_table = None
+
+
+def get_milestone_table():
+    global _milestone_table
+    table = _milestone_table
+    ttl = current_app.config.get('MILESTONE_CACHE_TTL', 60)
+    if table is None or time.monotonic() - table.loaded_at > ttl:
+        rows = db.session.execute(
+            db.select(Milestone.threshold, Milestone.name, Milestone.badge).order_by(Milestone.threshold)
+        ).all()
+        table = MilestoneTable(time.monotonic(), {row.threshold: row for row in rows})
+        _milestone_table = table
+    return table
+
+
+def invalidate_milestone_cache():
+    global _milestone_table
+    _milestone_table = None
+
+
+def milestones_between(old_hours, new_hours):
+    # Thresholds t with old_hours < t <= new_hours, as a primary key range scan so a tier
+    # added by another worker is never missed
+    return db.session.scalars(
+        db.select(Milestone.threshold)
+        .where(Milestone.threshold > old_hours, Milestone.threshold <= new_hours)
+        .order_by(Milestone.threshold)
+    ).all()
+
+
+def find_milestone(threshold):
+    return get_milestone_table().milestones.get(threshold)
@@ -8,6 +8,10 @@ class Student(User):
     id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
     total_hours = db.Column(db.Integer, default=0, nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_students_total_hours_id', 'total_hours', 'id'),
+    )
+
     __mapper_args__ = {
         'polymorphic_identity': 'student'
     }
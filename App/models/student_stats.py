@@ -0,0 +1,35 @@
+from App.database import db
+from App.models.hour_log import format_log_time
+
+
+class StudentStats(db.Model):
+    # Denormalized dashboard summary of one student's hour logs, kept up to date by every
+    # write path in the same transaction as the log change. `flask rebuild-stats` recomputes it.
+    __tablename__ = 'student_stats'
+
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True, autoincrement=False)
+    pending_count = db.Column(db.Integer, nullable=False, default=0)
+    pending_hours = db.Column(db.Integer, nullable=False, default=0)
+    confirmed_count = db.Column(db.Integer, nullable=False, default=0)
+    confirmed_hours = db.Column(db.Integer, nullable=False, default=0)
+    denied_count = db.Column(db.Integer, nullable=False, default=0)
+    denied_hours = db.Column(db.Integer, nullable=False, default=0)
+    # When the latest log was submitted, whether requested by the student or logged by staff
+    last_requested_at = db.Column(db.DateTime, nullable=True)
+    last_reviewed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<StudentStats {self.student_id} - {self.pending_count} pending, {self.confirmed_count} confirmed, {self.denied_count} denied>"
+
+    def get_json(self):
+        return {
+            'student_id': self.student_id,
+            'pending_count': self.pending_count or 0,
+            'pending_hours': self.pending_hours or 0,
+            'confirmed_count': self.confirmed_count or 0,
+            'confirmed_hours': self.confirmed_hours or 0,
+            'denied_count': self.denied_count or 0,
+            'denied_hours': self.denied_hours or 0,
+            'last_requested_at': format_log_time(self.last_requested_at),
+            'last_reviewed_at': format_log_time(self.last_reviewed_at)
+        }
@@ -1,5 +1,5 @@
-from werkzeug.security import check_password_hash, generate_password_hash
 from App.database import db
+from App.hashing import hash_password, verify_password, needs_rehash
 
 
 class User(db.Model):
@@ -8,6 +8,13 @@ class User(db.Model):
     username =  db.Column(db.String(20), nullable=False, unique=True)
     password = db.Column(db.String(256), nullable=False)
     role = db.Column(db.String(20), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_users_role_id', 'role', 'id'),
+        # Byte order copy of the username index for prefix ranges; SQLite already compares
+        # usernames in byte order, so it only exists on PostgreSQL
+        db.Index('ix_users_username_c', db.column('username').collate('C')).ddl_if(dialect='postgresql'),
+    )
    
     __mapper_args__ = {
         'polymorphic_identity':'user',
@@ -28,11 +35,15 @@ class User(db.Model):
 
     def set_password(self, password):
         """Create hashed password."""
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
     
     def check_password(self, password):
         """Check hashed password."""
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
+
+    def password_needs_rehash(self):
+        """Check whether the password was hashed with different settings than PASSWORD_HASH_METHOD."""
+        return needs_rehash(self.password)
     
     def __repr__(self):
         return f'User: {self.username}, Role: {self.role}'
\ No newline at end of file
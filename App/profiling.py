@@ -0,0 +1,197 @@
+import cProfile, io, itertools, logging, pstats, time
+from collections import Counter, deque
+from threading import Lock
+
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+
+from App.database import db, pool_stats
+from App.response_cache import cache_stats
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the request duration histogram, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+MAX_TRACKED_STATEMENTS = 500
+
+# Process-wide metrics, shared by the threads of one worker
+_lock = Lock()
+_endpoints = {}
+_statements = {}
+_profiles = deque(maxlen=20)
+_request_numbers = itertools.count(1)
+
+
+def init_profiling(app):
+    # Opt in with PROFILING_ENABLED. Records wall time and SQL statements per endpoint,
+    # flags statements repeated PROFILING_N_PLUS_ONE_THRESHOLD times in one request and,
+    # with PROFILING_SAMPLE_RATE = N, keeps a cProfile of one request in every N.
+    if not app.config.get('PROFILING_ENABLED', False) or 'profiling' in app.extensions:
+        return
+    app.extensions['profiling'] = True
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    app.before_request(_start_request)
+    app.teardown_request(_finish_request)
+
+
+def _request_profile():
+    # Per-request counters live in the WSGI environ, like the request identities in auth
+    if not has_request_context():
+        return None
+    return request.environ.get('app.profile')
+
+
+def _start_request():
+    request.environ['app.profile'] = {'started': time.perf_counter(), 'statements': Counter(), 'sql_seconds': 0.0}
+    rate = current_app.config.get('PROFILING_SAMPLE_RATE', 0)
+    if rate and next(_request_numbers) % rate == 0:
+        profiler = cProfile.Profile()
+        request.environ['app.profiler'] = profiler
+        profiler.enable()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_profile() is not None:
+        conn.info.setdefault('app.query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _request_profile()
+    started = conn.info.get('app.query_started')
+    if profile is None or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    profile['statements'][statement] += 1
+    profile['sql_seconds'] += elapsed
+
+    with _lock:
+        stats = _statements.get(statement)
+        if stats is None:
+            if len(_statements) >= MAX_TRACKED_STATEMENTS:
+                return
+            stats = _statements[statement] = {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+        stats['count'] += 1
+        stats['seconds'] += elapsed
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+
+
+def _finish_request(error=None):
+    profile = request.environ.pop('app.profile', None)
+    if profile is None:
+        return
+    elapsed = time.perf_counter() - profile['started']
+    endpoint = request.endpoint or 'unmatched'
+
+    profiler = request.environ.pop('app.profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(25)
+        with _lock:
+            _profiles.append({'endpoint': endpoint, 'path': request.full_path, 'seconds': elapsed, 'profile': output.getvalue()})
+
+    threshold = current_app.config.get('PROFILING_N_PLUS_ONE_THRESHOLD', 5)
+    repeated = [(statement, count) for statement, count in profile['statements'].items() if count >= threshold]
+    for statement, count in repeated:
+        logger.warning("Possible N+1 on %s: statement ran %d times: %s", endpoint, count, statement.splitlines()[0])
+
+    with _lock:
+        stats = _endpoints.setdefault(endpoint, {
+            'requests': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'sql_statements': 0, 'sql_seconds': 0.0,
+            'n_plus_one': 0, 'buckets': [0] * len(DURATION_BUCKETS)
+        })
+        stats['requests'] += 1
+        stats['seconds'] += elapsed
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+        stats['sql_statements'] += sum(profile['statements'].values())
+        stats['sql_seconds'] += profile['sql_seconds']
+        stats['n_plus_one'] += len(repeated)
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if elapsed <= bound:
+                stats['buckets'][i] += 1
+
+
+def profile_report(limit=10):
+    # Slowest endpoints by mean wall time, slowest statements by total time and the latest sampled profiles
+    with _lock:
+        endpoints = [
+            {
+                'endpoint': endpoint,
+                'requests': stats['requests'],
+                'mean_seconds': stats['seconds'] / stats['requests'],
+                'max_seconds': stats['max_seconds'],
+                'mean_sql_statements': stats['sql_statements'] / stats['requests'],
+                'mean_sql_seconds': stats['sql_seconds'] / stats['requests'],
+                'n_plus_one': stats['n_plus_one']
+            }
+            for endpoint, stats in _endpoints.items()
+        ]
+        statements = [{'statement': statement, **stats} for statement, stats in _statements.items()]
+        profiles = list(_profiles)
+
+    endpoints.sort(key=lambda e: e['mean_seconds'], reverse=True)
+    statements.sort(key=lambda s: s['seconds'], reverse=True)
+    return {'endpoints': endpoints[:limit], 'statements': statements[:limit], 'profiles': profiles}
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def prometheus_metrics():
+    # Text exposition format, see https://prometheus.io/docs/instrumenting/exposition_formats/
+    lines = []
+    with _lock:
+        endpoints = {endpoint: dict(stats, buckets=list(stats['buckets'])) for endpoint, stats in _endpoints.items()}
+
+    lines.append("# HELP app_request_duration_seconds Request wall time by endpoint.")
+    lines.append("# TYPE app_request_duration_seconds histogram")
+    for endpoint, stats in sorted(endpoints.items()):
+        label = f'endpoint="{_label(endpoint)}"'
+        for bound, count in zip(DURATION_BUCKETS, stats['buckets']):
+            lines.append(f'app_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f'app_request_duration_seconds_bucket{{{label},le="+Inf"}} {stats["requests"]}')
+        lines.append(f'app_request_duration_seconds_sum{{{label}}} {stats["seconds"]}')
+        lines.append(f'app_request_duration_seconds_count{{{label}}} {stats["requests"]}')
+
+    for name, key, help_text in (
+        ('app_sql_statements_total', 'sql_statements', "SQL statements executed by endpoint."),
+        ('app_sql_seconds_total', 'sql_seconds', "Time spent in SQL statements by endpoint."),
+        ('app_n_plus_one_total', 'n_plus_one', "Requests with a statement repeated past the N+1 threshold, by endpoint."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for endpoint, stats in sorted(endpoints.items()):
+            lines.append(f'{name}{{endpoint="{_label(endpoint)}"}} {stats[key]}')
+
+    lines.append("# HELP app_response_cache_total Response cache lookups by cache and outcome.")
+    lines.append("# TYPE app_response_cache_total counter")
+    for namespace, counters in sorted(cache_stats().items()):
+        for outcome, count in sorted(counters.items()):
+            lines.append(f'app_response_cache_total{{cache="{_label(namespace)}",outcome="{outcome}"}} {count}')
+
+    pool = pool_stats()
+    for name, key, kind, help_text in (
+        ('app_db_pool_checkouts_total', 'checkouts', 'counter', "Database connections checked out of the pool."),
+        ('app_db_pool_checkout_wait_seconds_total', 'checkout_wait_seconds', 'counter', "Time spent waiting for a pooled connection."),
+        ('app_db_pool_checkout_wait_seconds_max', 'max_checkout_wait_seconds', 'gauge', "Longest wait for a pooled connection."),
+        ('app_db_pool_checkout_timeouts_total', 'checkout_timeouts', 'counter', "Checkouts that gave up after the pool timeout."),
+        ('app_db_pool_size', 'pool_size', 'gauge', "Connections the pool keeps open."),
+        ('app_db_pool_checked_out', 'checked_out', 'gauge', "Connections in use."),
+        ('app_db_pool_overflow', 'overflow', 'gauge', "Connections open beyond the pool size."),
+    ):
+        if key in pool:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {pool[key]}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_profiling():
+    with _lock:
+        _endpoints.clear()
+        _statements.clear()
+        _profiles.clear()
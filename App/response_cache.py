@@ -0,0 +1,212 @@
+import hashlib, os, sqlite3, time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from threading import Lock, local
+from urllib.parse import urlencode
+
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+
+from App.database import db
+
+CachedResponse = namedtuple('CachedResponse', ['status', 'mimetype', 'body', 'etag'])
+
+# Process-wide hit/miss counters per namespace, for monitoring
+_stats = {}
+_stats_lock = Lock()
+
+
+class MemoryCacheBackend:
+    # LRU of cached responses and a dict of namespace versions, shared by the threads of one
+    # worker. Versions are per worker, so other workers notice a write only when their TTL runs out.
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, response, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def version(self, namespace):
+        return self._versions.get(namespace, 0)
+
+    def bump(self, namespace):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    # Responses and versions in a SQLite file that every worker on the host opens, so a write
+    # in one worker invalidates the others at once. Each thread keeps its own connection.
+
+    def __init__(self, path):
+        self.path = path
+        self._local = local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL NOT NULL, "
+                "status INTEGER NOT NULL, mimetype TEXT NOT NULL, body BLOB NOT NULL, etag TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS versions (namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT status, mimetype, body, etag FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def set(self, key, response, ttl):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, expires_at, status, mimetype, body, etag) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, time.time() + ttl, *response)
+        )
+        # Entries for old versions are never read again; sweep expired rows now and then
+        if hash(key) % 100 == 0:
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+    def version(self, namespace):
+        row = self._connect().execute("SELECT version FROM versions WHERE namespace = ?", (namespace,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, namespace):
+        self._connect().execute(
+            "INSERT INTO versions (namespace, version) VALUES (?, 1) "
+            "ON CONFLICT (namespace) DO UPDATE SET version = version + 1",
+            (namespace,)
+        )
+
+    def clear(self):
+        self._connect().execute("DELETE FROM responses")
+
+
+_backends = {}
+_backends_lock = Lock()
+
+
+def get_cache_backend():
+    # RESPONSE_CACHE_BACKEND is "memory" (default), "sqlite" or "none"
+    config = current_app.config
+    kind = config.get('RESPONSE_CACHE_BACKEND', 'memory')
+    if kind == 'none':
+        return None
+    if kind == 'sqlite':
+        path = config.get('RESPONSE_CACHE_PATH') or os.path.join(current_app.instance_path, 'response_cache.db')
+        key = (kind, path)
+    else:
+        key = (kind, config.get('RESPONSE_CACHE_SIZE', 1024))
+
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = SQLiteCacheBackend(key[1]) if kind == 'sqlite' else MemoryCacheBackend(key[1])
+        return _backends[key]
+
+
+def count_cache_outcome(namespace, outcome):
+    with _stats_lock:
+        counters = _stats.setdefault(namespace, dict.fromkeys(('hits', 'misses', 'not_modified', 'stores'), 0))
+        counters[outcome] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        return {namespace: dict(counters) for namespace, counters in _stats.items()}
+
+
+def cache_key(namespace, version, path, args):
+    # args are (name, value) pairs; their order doesn't matter
+    query = urlencode(sorted(args))
+    return f"{namespace}:{version}:{path}?{query}"
+
+
+def _conditional(cached):
+    response = current_app.response_class(cached.body, status=cached.status, mimetype=cached.mimetype)
+    response.set_etag(cached.etag)
+    return response.make_conditional(request)
+
+
+def cached_response(namespace, ttl):
+    # Caches successful GET responses of a public view for `ttl` seconds, or for
+    # RESPONSE_CACHE_TTLS[<endpoint>] when configured. Entries are keyed by the namespace's
+    # version, so invalidate(namespace) after a write makes every cached page of it stale.
+    # Clients sending If-None-Match with the current ETag get an empty 304.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            backend = get_cache_backend()
+            route_ttl = current_app.config.get('RESPONSE_CACHE_TTLS', {}).get(request.endpoint, ttl)
+            if backend is None or route_ttl <= 0:
+                return view(*args, **kwargs)
+
+            key = cache_key(namespace, backend.version(namespace), request.path, request.args.items(multi=True))
+            cached = backend.get(key)
+            if cached is not None:
+                response = _conditional(cached)
+                count_cache_outcome(namespace, 'not_modified' if response.status_code == 304 else 'hits')
+                return response
+
+            count_cache_outcome(namespace, 'misses')
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            body = response.get_data()
+            cached = CachedResponse(response.status_code, response.mimetype, body, hashlib.sha1(body).hexdigest())
+            backend.set(key, cached, route_ttl)
+            count_cache_outcome(namespace, 'stores')
+            return _conditional(cached)
+        return wrapper
+    return decorator
+
+
+def invalidate(*namespaces):
+    # Marks cached responses stale once the current transaction commits. Bumping before
+    # the commit would let a concurrent request cache pre-commit data under the new version.
+    pending = db.session.info.setdefault('cache_invalidations', set())
+    pending.update(namespaces)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_versions(session):
+    pending = session.info.pop('cache_invalidations', None)
+    if not pending or not has_app_context():
+        return
+    backend = get_cache_backend()
+    if backend is not None:
+        for namespace in sorted(pending):
+            backend.bump(namespace)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('cache_invalidations', None)
@@ -0,0 +1,5 @@
+from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet
+
+
+photos = UploadSet('photos', TEXT + DOCUMENTS + IMAGES)
+hour_sheets = UploadSet('hoursheets', ('csv', 'jsonl', 'ndjson'))
@@ -6,7 +6,10 @@ from .auth import auth_views
 from .admin import setup_admin
 from .student import student_views
 from .staff import staff_views
+from .report import report_views
+from .metrics import metrics_views
 
 
-views = [user_views, index_views, auth_views, student_views, staff_views] 
-# blueprints must be added to this list
\ No newline at end of file
+views = [user_views, index_views, auth_views, student_views, staff_views, report_views] 
+# blueprints must be added to this list
+# (metrics_views is left out: create_app registers it only when PROFILING_ENABLED is set)
\ No newline at end of file
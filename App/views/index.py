@@ -1,5 +1,6 @@
 from flask import Blueprint, redirect, render_template, request, send_from_directory, jsonify
 from App.controllers import create_user, initialize
+from App.response_cache import cached_response, cache_stats
 
 index_views = Blueprint('index_views', __name__, template_folder='../templates')
 
@@ -13,5 +14,10 @@ def init():
     return jsonify(message='db initialized!')
 
 @index_views.route('/health', methods=['GET'])
+@cached_response('health', ttl=5)
 def health_check():
-    return jsonify({'status':'healthy'})
\ No newline at end of file
+    return jsonify({'status':'healthy'})
+
+@index_views.route('/api/cache/stats', methods=['GET'])
+def response_cache_stats():
+    return jsonify(cache_stats())
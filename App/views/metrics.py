@@ -0,0 +1,37 @@
+import hmac
+from functools import wraps
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request, current_user as jwt_current_user
+
+from App.profiling import prometheus_metrics, profile_report
+
+# Registered by create_app only when PROFILING_ENABLED is set
+metrics_views = Blueprint('metrics_views', __name__)
+
+
+def metrics_access_required(view):
+    # Scrapers send METRICS_TOKEN as a bearer token; people use a staff JWT
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('METRICS_TOKEN')
+        header = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+            return view(*args, **kwargs)
+
+        verify_jwt_in_request()
+        if not jwt_current_user or jwt_current_user.role != 'staff':
+            return jsonify(message="Only staff can view metrics"), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@metrics_views.route('/metrics', methods=['GET'])
+@metrics_access_required
+def metrics():
+    return prometheus_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@metrics_views.route('/metrics/profile', methods=['GET'])
+@metrics_access_required
+def profile_metrics():
+    return jsonify(profile_report(request.args.get('limit', 10, type=int)))
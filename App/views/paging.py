@@ -0,0 +1,18 @@
+# Query string paging shared by the paged list endpoints
+
+MAX_PER_PAGE = 100
+PAGING_MESSAGE = f"page must be at least 1 and per_page between 1 and {MAX_PER_PAGE}"
+
+
+def page_args(args):
+    # (page, per_page) from the query string, page None when absent. Anything that isn't a
+    # whole number in range raises ValueError with the 400 message rather than being ignored,
+    # which would return the whole unpaged list.
+    try:
+        page = int(args['page']) if 'page' in args else None
+        per_page = int(args['per_page']) if 'per_page' in args else 50
+    except ValueError:
+        raise ValueError(PAGING_MESSAGE) from None
+    if (page is not None and page < 1) or not 0 < per_page <= MAX_PER_PAGE:
+        raise ValueError(PAGING_MESSAGE)
+    return page, per_page
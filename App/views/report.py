@@ -0,0 +1,119 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask_jwt_extended import jwt_required, current_user as jwt_current_user
+
+from App.controllers.report import (
+    export_hour_logs,
+    parse_report_date,
+    get_staff_review_stats,
+    staff_review_stats_json,
+    REPORT_FORMATS,
+    REPORT_STATUSES
+)
+from App.controllers.hour_rollup import get_hour_series, ROLLUP_GRANULARITIES
+
+
+report_views = Blueprint('report_views', __name__, template_folder='../templates')
+
+
+REPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+# ?format=ndjson|csv&start=YYYY-MM-DD&end=YYYY-MM-DD&status=<status>&staff_id=<id>
+# The body is streamed batch by batch, so the export never sits in memory.
+@report_views.route('/api/reports/hour_logs', methods=['GET'])
+@jwt_required()
+def hour_log_report():
+    staff = jwt_current_user
+
+    if not staff or staff.role != 'staff':
+        return jsonify(message="Only staff can export hour logs"), 403
+
+    args = request.args
+    fmt = args.get('format', 'ndjson')
+    if fmt not in REPORT_FORMATS:
+        return jsonify(message="format must be ndjson or csv"), 400
+
+    status = args.get('status')
+    if status is not None and status not in REPORT_STATUSES:
+        return jsonify(message=f"status must be one of {', '.join(REPORT_STATUSES)}"), 400
+
+    staff_id = args.get('staff_id', type=int)
+    if 'staff_id' in args and staff_id is None:
+        return jsonify(message="staff_id must be a staff id"), 400
+
+    try:
+        start = parse_report_date(args['start']) if args.get('start') else None
+        end = parse_report_date(args['end'], end=True) if args.get('end') else None
+    except ValueError:
+        return jsonify(message="start and end must be dates like 2024-01-31"), 400
+
+    chunks = export_hour_logs(fmt, start=start, end=end, status=status, staff_id=staff_id)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=REPORT_MIMETYPES[fmt],
+        headers={'Content-Disposition': f"attachment; filename=hour_logs.{fmt}"}
+    )
+
+
+# ?start=YYYY-MM-DD&end=YYYY-MM-DD&staff_id=<id>, filtering on when logs were reviewed
+@report_views.route('/api/staff/stats', methods=['GET'])
+@jwt_required()
+def staff_review_stats():
+    staff = jwt_current_user
+
+    if not staff or staff.role != 'staff':
+        return jsonify(message="Only staff can view review stats"), 403
+
+    args = request.args
+    staff_id = args.get('staff_id', type=int)
+    if 'staff_id' in args and staff_id is None:
+        return jsonify(message="staff_id must be a staff id"), 400
+
+    try:
+        start = parse_report_date(args['start']) if args.get('start') else None
+        end = parse_report_date(args['end'], end=True) if args.get('end') else None
+    except ValueError:
+        return jsonify(message="start and end must be dates like 2024-01-31"), 400
+
+    rows = get_staff_review_stats(start, end, staff_id)
+    return jsonify([staff_review_stats_json(row) for row in rows]), 200
+
+
+# ?granularity=day|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD, for everyone or one
+# ?student_id=<id> or ?staff_id=<id>. Read from the daily rollups, never from hour_logs.
+@report_views.route('/api/reports/hours', methods=['GET'])
+@jwt_required()
+def hour_series():
+    staff = jwt_current_user
+
+    if not staff or staff.role != 'staff':
+        return jsonify(message="Only staff can view hour reports"), 403
+
+    args = request.args
+    granularity = args.get('granularity', 'day')
+    if granularity not in ROLLUP_GRANULARITIES:
+        return jsonify(message="granularity must be day, week or month"), 400
+
+    if 'student_id' in args and 'staff_id' in args:
+        return jsonify(message="Give student_id or staff_id, not both"), 400
+    scope, scope_id = 'all', 0
+    for key, key_scope in (('student_id', 'student'), ('staff_id', 'staff')):
+        if key in args:
+            scope, scope_id = key_scope, args.get(key, type=int)
+            if scope_id is None:
+                return jsonify(message=f"{key} must be an id"), 400
+
+    try:
+        start = parse_report_date(args['start']).date() if args.get('start') else None
+        end = parse_report_date(args['end'], end=True).date() if args.get('end') else None
+    except (ValueError, OverflowError):
+        return jsonify(message="start and end must be dates like 2024-01-31"), 400
+
+    try:
+        series = get_hour_series(granularity, scope, scope_id, start, end)
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
+    return jsonify(series), 200
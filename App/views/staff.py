@@ -1,7 +1,13 @@
+import os
 from flask import Blueprint, render_template, jsonify, request, send_from_directory, flash, redirect, url_for
+from flask_uploads import UploadNotAllowed
 from flask_jwt_extended import get_jwt_identity, jwt_required, current_user as jwt_current_user
 
-from App.controllers.staff import get_pending_logs, confirm_hours, deny_hours, get_staff, log_hours
+from App.controllers.staff import get_pending_queue, confirm_hours, deny_hours, log_hours, confirm_hours_bulk, deny_hours_bulk
+from App.controllers.hour_import import import_hours_file
+from App.models.hour_log import format_log_time
+from App.upload_sets import hour_sheets
+from App.views.paging import page_args
 
 
 staff_views = Blueprint('staff_views', __name__, template_folder='../templates')
@@ -9,20 +15,28 @@ staff_views = Blueprint('staff_views', __name__, template_folder='../templates')
 @staff_views.route('/staff/pending', methods=['GET'])
 @jwt_required()
 def pending_logs():
-    staff_id = get_jwt_identity()
-    staff = get_staff(staff_id)
+    staff = jwt_current_user
 
     if not staff or staff.role != 'staff':
         return jsonify(message="Only staff can view pending logs"), 403
     
-    logs = get_pending_logs()
+    try:
+        page, per_page = page_args(request.args)
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
+    order = request.args.get('order', 'oldest')
+
+    if order not in ('oldest', 'newest'):
+        return jsonify(message="order must be 'oldest' or 'newest'"), 400
+
+    logs = get_pending_queue(page, per_page, newest_first=order == 'newest')
    
     return jsonify([{
         'id': log.id,
-        'student': log.student.username,
+        'student': log.student,
         'hours': log.hours,
         'status': log.status,
-        'created_at': log.format_created_time()
+        'created_at': format_log_time(log.created_at)
     } for log in logs]), 200
 
 
@@ -30,8 +44,7 @@ def pending_logs():
 @staff_views.route('/staff/log_hours', methods=['POST'])
 @jwt_required()
 def log_student_hours():
-    staff_id = get_jwt_identity()
-    staff = get_staff(staff_id)
+    staff = jwt_current_user
 
     if not staff or staff.role != 'staff':
         return jsonify(message="Only staff can log hours"), 403
@@ -64,8 +77,7 @@ def log_student_hours():
 @staff_views.route('/staff/confirm/<int:log_id>', methods=['PUT'])
 @jwt_required()
 def confirm_log(log_id):
-    staff_id = get_jwt_identity()
-    staff = get_staff(staff_id)
+    staff = jwt_current_user
 
     if not staff or staff.role != 'staff':
         return jsonify(message="Only staff can confirm logs"), 403
@@ -91,8 +103,7 @@ def confirm_log(log_id):
 @staff_views.route('/staff/deny/<int:log_id>', methods=['PUT'])
 @jwt_required()
 def deny_log(log_id):
-    staff_id = get_jwt_identity()
-    staff = get_staff(staff_id)
+    staff = jwt_current_user
 
     if not staff or staff.role != 'staff':
         return jsonify(message="Only staff can deny logs"), 403
@@ -112,6 +123,86 @@ def deny_log(log_id):
             "reviewed_at": log.format_reviewed_time()
         }
     }), 200
-    
 
-    
\ No newline at end of file
+
+MAX_BULK_REVIEW = 500
+
+
+def bulk_log_ids(data):
+    log_ids = data.get('log_ids') if isinstance(data, dict) else None
+    if not isinstance(log_ids, list) or not log_ids or len(log_ids) > MAX_BULK_REVIEW:
+        return None
+    if not all(isinstance(log_id, int) and not isinstance(log_id, bool) for log_id in log_ids):
+        return None
+    return log_ids
+
+
+@staff_views.route('/staff/confirm', methods=['POST'])
+@jwt_required()
+def confirm_logs_bulk():
+    staff = jwt_current_user
+
+    if not staff or staff.role != 'staff':
+        return jsonify(message="Only staff can confirm logs"), 403
+
+    log_ids = bulk_log_ids(request.get_json(silent=True))
+    if log_ids is None:
+        return jsonify(message=f"log_ids must be a list of 1 to {MAX_BULK_REVIEW} log ids"), 400
+
+    results = confirm_hours_bulk(staff.id, log_ids)
+    confirmed = sum(1 for result in results if result['success'])
+
+    return jsonify({
+        'message': f"Confirmed {confirmed} of {len(results)} logs",
+        'results': results
+    }), 200
+
+
+@staff_views.route('/staff/deny', methods=['POST'])
+@jwt_required()
+def deny_logs_bulk():
+    staff = jwt_current_user
+
+    if not staff or staff.role != 'staff':
+        return jsonify(message="Only staff can deny logs"), 403
+
+    log_ids = bulk_log_ids(request.get_json(silent=True))
+    if log_ids is None:
+        return jsonify(message=f"log_ids must be a list of 1 to {MAX_BULK_REVIEW} log ids"), 400
+
+    results = deny_hours_bulk(staff.id, log_ids)
+    denied = sum(1 for result in results if result['success'])
+
+    return jsonify({
+        'message': f"Denied {denied} of {len(results)} logs",
+        'results': results
+    }), 200
+
+
+@staff_views.route('/staff/import_hours', methods=['POST'])
+@jwt_required()
+def import_hours_upload():
+    staff = jwt_current_user
+
+    if not staff or staff.role != 'staff':
+        return jsonify(message="Only staff can import hours"), 403
+
+    sheet = request.files.get('file')
+    if not sheet or not sheet.filename:
+        return jsonify(message="No hour sheet uploaded"), 400
+
+    try:
+        filename = hour_sheets.save(sheet)
+    except UploadNotAllowed:
+        return jsonify(message="Hour sheets must be .csv or .jsonl files"), 400
+
+    path = hour_sheets.path(filename)
+    dry_run = request.form.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    try:
+        summary = import_hours_file(staff.id, path, dry_run=dry_run)
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
+    finally:
+        os.remove(path)
+
+    return jsonify(summary), 200
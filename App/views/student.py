@@ -1,14 +1,16 @@
 from flask import Blueprint, render_template, jsonify, request, send_from_directory, flash, redirect, url_for
 from flask_jwt_extended import get_jwt_identity, jwt_required, current_user as jwt_current_user
 from  App.models import Student
-from App.controllers.student import request_hours, get_student_logs, get_student_accolades, get_student
+from App.models.hour_log import format_log_time
+from App.controllers.student import request_hours, get_student_log_page, get_student_accolades
+from App.controllers.student_stats import get_student_stats
+from App.views.paging import page_args
 student_views = Blueprint('student_views', __name__, template_folder='../templates')
 
 @student_views.route('/student/request_hours', methods=['POST'])
 @jwt_required()
 def request_student_hours():
-    student_id = get_jwt_identity()
-    student = get_student(student_id)
+    student = jwt_current_user
 
     if not student or student.role != 'student':
         return jsonify(message="Only students can request hours"), 403
@@ -21,42 +23,52 @@ def request_student_hours():
     return jsonify(message=f"Student {student.id}requested {data['hours']} hours successfully"), 201
 
 
+def student_log_args(args):
+    # (page, per_page, status) from the query string. Raises ValueError with the 400 message.
+    page, per_page = page_args(args)
+    status = args.get('status')
+
+    if status is not None and status not in ('requested', 'confirmed', 'denied'):
+        raise ValueError("status must be 'requested', 'confirmed' or 'denied'")
+    return page, per_page, status
+
+
+def student_log_entry(log):
+    return {
+        'id': log.id,
+        'hours': log.hours,
+        'status': log.status,
+        'confirmed_by': log.staff or "pending",
+        'created_at': format_log_time(log.created_at),
+        'reviewed_at': format_log_time(log.reviewed_at, "Not reviewed yet")
+    }
+
+
 @student_views.route('/student/logs', methods=['GET'])
 @jwt_required()
 def student_logs():
-    student_id = get_jwt_identity()
-    student = get_student(student_id)
+    student = jwt_current_user
 
     if not student or student.role != 'student':
         return jsonify(message="Only students can view their logs"), 403
     
-    logs = get_student_logs(student.id)
+    try:
+        page, per_page, status = student_log_args(request.args)
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
+
+    logs = get_student_log_page(student.id, status, page, per_page)
 
     if not logs:
         return jsonify(message="No logs found"), 404
-    
-    for log in logs:
-        if log.staff:
-            staff_name = log.staff.username
-        else:
-            staff_name = "pending"
-
-    return jsonify([{
-        'id': log.id,
-        'hours': log.hours,
-        'status': log.status,
-        'confirmed_by' :staff_name,
-        'created_at' : log.format_created_time(),
-        'reviewed_at': log.format_reviewed_time()
 
-    } for log in logs]), 200
+    return jsonify([student_log_entry(log) for log in logs]), 200
 
 
 @student_views.route('/student/accolades', methods=['GET'])
 @jwt_required()
 def student_accolades():
-    student_id = get_jwt_identity()
-    student = get_student(student_id)
+    student = jwt_current_user
 
     if not student or student.role != 'student':
         return jsonify(message="Only students can view their accolades"), 403
@@ -70,3 +82,15 @@ def student_accolades():
         "awarded_at": accolade.format_awarded_time()
     } for accolade in accolades]), 200
 
+
+
+
+@student_views.route('/student/stats', methods=['GET'])
+@jwt_required()
+def student_stats():
+    student = jwt_current_user
+
+    if not student or student.role != 'student':
+        return jsonify(message="Only students can view their stats"), 403
+
+    return jsonify(get_student_stats(student.id).get_json()), 200
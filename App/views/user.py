@@ -2,29 +2,130 @@ from flask import Blueprint, render_template, jsonify, request, send_from_direct
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
 
 from.index import index_views
+from App.response_cache import cached_response
 
 from App.controllers import (
     create_user,
-    get_all_users,
     get_all_users_json,
+    list_users,
+    user_json,
     get_leaderboard,
+    get_leaderboard_top,
+    get_leaderboard_after,
+    get_leaderboard_around,
+    encode_leaderboard_cursor,
+    decode_leaderboard_cursor,
+    create_users_bulk,
     jwt_required
 )
 
 user_views = Blueprint('user_views', __name__, template_folder='../templates')
 
 
+MAX_LEADERBOARD_LIMIT = 100
+LEADERBOARD_CACHE_TTL = 10
+# Hashed one after another on a single hashing slot, so kept to a few seconds of work;
+# larger imports go through flask import-users
+MAX_BULK_USERS = 50
+MAX_USERS_LIMIT = 200
+USER_ROLE_FILTERS = ('all', 'student', 'staff')
+
+
+def leaderboard_entry(row):
+    return {
+        'rank': row.rank,
+        'student_id': row.id,
+        'username': row.username,
+        'total_hours': row.total_hours
+    }
+
+
+def leaderboard_window(args):
+    # Which window the query string asks for: ('top', n), ('around', (student_id, radius)),
+    # ('after', (cursor, limit)) or ('all', None). Raises ValueError with the 400 message.
+    if 'top' in args:
+        top = args.get('top', type=int)
+        if top is None or not 0 < top <= MAX_LEADERBOARD_LIMIT:
+            raise ValueError(f"top must be between 1 and {MAX_LEADERBOARD_LIMIT}")
+        return 'top', top
+
+    if 'around' in args:
+        student_id = args.get('around', type=int)
+        radius = args.get('radius', 5, type=int)
+        if student_id is None or radius is None or not 0 <= radius <= MAX_LEADERBOARD_LIMIT:
+            raise ValueError(f"around must be a student id and radius between 0 and {MAX_LEADERBOARD_LIMIT}")
+        return 'around', (student_id, radius)
+
+    if 'limit' in args or 'cursor' in args:
+        limit = args.get('limit', 20, type=int)
+        if limit is None or not 0 < limit <= MAX_LEADERBOARD_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LEADERBOARD_LIMIT}")
+        try:
+            cursor = decode_leaderboard_cursor(args['cursor']) if args.get('cursor') else None
+        except ValueError:
+            raise ValueError("Invalid cursor")
+        return 'after', (cursor, limit)
+
+    return 'all', None
+
+
+# With no query parameters the full ranked table is returned as before.
+# ?top=N, ?around=<student_id>&radius=R and ?limit=N&cursor=<hours:id> return one window.
 @user_views.route('/leaderboard', methods=['GET'])
+@cached_response('leaderboard', ttl=LEADERBOARD_CACHE_TTL)
 def leaderboard_page():
+    try:
+        window, params = leaderboard_window(request.args)
+    except ValueError as e:
+        return jsonify(message=str(e)), 400
+
+    if window == 'top':
+        rows = get_leaderboard_top(params)
+        return jsonify(leaderboard=[leaderboard_entry(row) for row in rows]), 200
+
+    if window == 'around':
+        rows = get_leaderboard_around(*params)
+        if rows is None:
+            return jsonify(message="Student not found"), 404
+        return jsonify(leaderboard=[leaderboard_entry(row) for row in rows]), 200
+
+    if window == 'after':
+        cursor, limit = params
+        rows = get_leaderboard_after(cursor, limit)
+        next_cursor = encode_leaderboard_cursor(rows[-1]) if len(rows) == limit else None
+        return jsonify(leaderboard=[leaderboard_entry(row) for row in rows], next_cursor=next_cursor), 200
+
     leaderboard = get_leaderboard()
     return jsonify(leaderboard), 200
 
 
 
+def user_page_args(args, default_limit):
+    # Returns (type, prefix, after_id, limit) from ?role=&prefix=&after=&limit=, or None if invalid
+    role = args.get('role', 'all')
+    limit = args.get('limit', default_limit, type=int)
+    after_id = args.get('after', type=int)
+    if role not in USER_ROLE_FILTERS or limit is None or not 0 < limit <= MAX_USERS_LIMIT:
+        return None
+    if 'after' in args and after_id is None:
+        return None
+    return role, args.get('prefix', '').strip() or None, after_id, limit
+
+
+def next_user_cursor(rows, limit):
+    return rows[-1].id if len(rows) == limit else None
+
+
 @user_views.route('/users', methods=['GET'])
 def get_user_page():
-    users = get_all_users()
-    return render_template('users.html', users=users)
+    page_args = user_page_args(request.args, 50)
+    if page_args is None:
+        flash("Invalid user filter")
+        return redirect(url_for('user_views.get_user_page'))
+    role, prefix, after_id, limit = page_args
+    users = list_users(role, prefix, after_id, limit)
+    return render_template('users.html', users=users, role=role, prefix=prefix or '',
+                           next_cursor=next_user_cursor(users, limit))
 
 @user_views.route('/users', methods=['POST'])
 def create_user_action():
@@ -33,10 +134,20 @@ def create_user_action():
     create_user(data['username'], data['password'], data['role'])
     return redirect(url_for('user_views.get_user_page'))
 
+# With no query parameters every user is returned as before.
+# ?role=student|staff, ?prefix=<username start>, ?limit=N and ?after=<user id> return one page.
 @user_views.route('/api/users', methods=['GET'])
+@cached_response('users', ttl=30)
 def get_users_action():
-    users = get_all_users_json()
-    return jsonify(users)
+    if not request.args:
+        return jsonify(get_all_users_json())
+
+    page_args = user_page_args(request.args, 50)
+    if page_args is None:
+        return jsonify(message=f"role must be one of {', '.join(USER_ROLE_FILTERS)}, after a user id and limit between 1 and {MAX_USERS_LIMIT}"), 400
+    role, prefix, after_id, limit = page_args
+    rows = list_users(role, prefix, after_id, limit)
+    return jsonify(users=[user_json(row) for row in rows], next_cursor=next_user_cursor(rows, limit)), 200
 
 @user_views.route('/api/users', methods=['POST'])
 def create_user_endpoint():
@@ -44,6 +155,24 @@ def create_user_endpoint():
     user = create_user(data['username'], data['password'], data['role'])
     return jsonify({'message': f"user {user.username} created with id {user.id} and role {user.role}"})
 
+# Body: {"users": [{"username": ..., "password": ..., "role": "student" or "staff"}, ...]}
+@user_views.route('/api/users/bulk', methods=['POST'])
+@jwt_required()
+def create_users_bulk_endpoint():
+    staff = jwt_current_user
+
+    if not staff or staff.role != 'staff':
+        return jsonify(message="Only staff can create users in bulk"), 403
+
+    data = request.get_json(silent=True)
+    users = data.get('users') if isinstance(data, dict) else None
+    if not isinstance(users, list) or not users or len(users) > MAX_BULK_USERS:
+        return jsonify(message=f"users must be a list of 1 to {MAX_BULK_USERS} users"), 400
+
+    # Errors refer to positions in the users list, starting at 1
+    summary = create_users_bulk(enumerate(users, start=1))
+    return jsonify(summary), 201 if summary['created'] else 200
+
 @user_views.route('/static/users', methods=['GET'])
 def static_user_page():
   return send_from_directory('static', 'static-user.html')
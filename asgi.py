@@ -0,0 +1,6 @@
+from App.main import create_app
+from App.async_api import AsyncReadAPI
+
+# ASGI entry point: the polled read endpoints run on the async engine and every other
+# request is passed to the Flask app. Serve with `uvicorn asgi:app --workers 4`.
+app = AsyncReadAPI(create_app({'PUSH_APP_CONTEXT': False}))
@@ -0,0 +1,127 @@
+"""
+Seeds a database with synthetic students, staff and hour logs using bulk inserts, then
+rebuilds the leaderboard, student stats and hour rollups from the logs.
+
+    $ python -m benchmarks.datagen --database sqlite:////tmp/bench.db --students 10000 --logs 1000000
+
+Every user's password is "benchpass"; students are bench_s<n> and staff bench_t<n>.
+"""
+import argparse, random, time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from sqlalchemy import func
+
+from App.main import create_app
+from App.database import db, create_db
+from App.models import User, Student, Staff, HourLog
+from App.hashing import hash_password
+from App.controllers import rebuild_leaderboard, rebuild_student_stats, rebuild_hour_rollups
+
+BENCH_PASSWORD = "benchpass"
+STATUSES = ('requested', 'confirmed', 'denied')
+
+
+def student_username(n):
+    return f"bench_s{n}"
+
+
+def staff_username(n):
+    return f"bench_t{n}"
+
+
+def parse_status_mix(value):
+    # "requested=0.2,confirmed=0.7,denied=0.1" -> weights in STATUSES order
+    weights = dict.fromkeys(STATUSES, 0.0)
+    for part in value.split(','):
+        status, _, weight = part.partition('=')
+        if status.strip() not in weights:
+            raise argparse.ArgumentTypeError(f"status must be one of {', '.join(STATUSES)}")
+        weights[status.strip()] = float(weight)
+    if sum(weights.values()) <= 0:
+        raise argparse.ArgumentTypeError("at least one status needs a positive weight")
+    return [weights[status] for status in STATUSES]
+
+
+def _insert_users(table, role, usernames, password_hash, batch_size):
+    ids = []
+    for i in range(0, len(usernames), batch_size):
+        rows = db.session.execute(
+            db.insert(User.__table__).returning(User.__table__.c.id),
+            [{'username': username, 'password': password_hash, 'role': role} for username in usernames[i:i + batch_size]]
+        ).scalars().all()
+        extra = {'total_hours': 0} if role == 'student' else {}
+        db.session.execute(db.insert(table), [{'id': user_id, **extra} for user_id in rows])
+        ids.extend(rows)
+    db.session.commit()
+    return ids
+
+
+def _log_rows(count, student_ids, staff_ids, weights, days, now, rng):
+    for _ in range(count):
+        status = rng.choices(STATUSES, weights)[0]
+        created_at = now - timedelta(seconds=rng.randrange(days * 86400))
+        row = {'student_id': rng.choice(student_ids), 'hours': rng.randint(1, 8), 'status': status,
+               'created_at': created_at, 'staff_id': None, 'reviewed_at': None}
+        if status != 'requested':
+            row['staff_id'] = rng.choice(staff_ids)
+            row['reviewed_at'] = min(now, created_at + timedelta(seconds=rng.randrange(1, 3 * 86400)))
+        yield row
+
+
+def seed(students=1000, staff=20, logs=100000, status_mix=(0.2, 0.7, 0.1), days=180, batch_size=5000, random_seed=0):
+    # Expects an app context on an empty database. Returns the seconds each step took.
+    rng = random.Random(random_seed)
+    timings = {}
+
+    start = time.perf_counter()
+    # One hash for everyone keeps seeding fast at any hashing cost
+    password_hash = hash_password(BENCH_PASSWORD)
+    student_ids = _insert_users(Student.__table__, 'student', [student_username(i) for i in range(students)], password_hash, batch_size)
+    staff_ids = _insert_users(Staff.__table__, 'staff', [staff_username(i) for i in range(staff)], password_hash, batch_size)
+    timings['users'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    rows = _log_rows(logs, student_ids, staff_ids, status_mix, days, now, rng)
+    for _ in range(0, logs, batch_size):
+        db.session.execute(db.insert(HourLog.__table__), list(islice(rows, batch_size)))
+        db.session.commit()
+    timings['logs'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    confirmed = (
+        db.select(func.coalesce(func.sum(HourLog.hours), 0))
+        .where(HourLog.student_id == Student.id, HourLog.status == 'confirmed')
+        .scalar_subquery()
+    )
+    db.session.execute(db.update(Student.__table__).values(total_hours=confirmed))
+    db.session.commit()
+    rebuild_leaderboard()
+    rebuild_student_stats()
+    rebuild_hour_rollups()
+    timings['derived'] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', required=True, help="SQLAlchemy URI of an empty database to seed")
+    parser.add_argument('--students', type=int, default=1000, help="Students to create")
+    parser.add_argument('--staff', type=int, default=20, help="Staff to create")
+    parser.add_argument('--logs', type=int, default=100000, help="Hour logs to create")
+    parser.add_argument('--status-mix', type=parse_status_mix, default=(0.2, 0.7, 0.1),
+                        help="Share of each log status, e.g. requested=0.2,confirmed=0.7,denied=0.1")
+    parser.add_argument('--days', type=int, default=180, help="Spread log creation times over this many days")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    create_app({'SQLALCHEMY_DATABASE_URI': args.database})
+    create_db()
+    timings = seed(args.students, args.staff, args.logs, args.status_mix, args.days, random_seed=args.seed)
+    print(f"Seeded {args.students} students, {args.staff} staff and {args.logs} logs in "
+          + ", ".join(f"{step} {seconds:.1f}s" for step, seconds in timings.items()))
+
+
+if __name__ == '__main__':
+    main()
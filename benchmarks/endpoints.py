@@ -0,0 +1,274 @@
+"""
+Load tests the REST endpoints and reports p50/p95/p99 latency, requests/sec and SQL
+statements per request, saving the results as JSON so runs can be compared across commits.
+
+In process, on a freshly seeded temporary SQLite database (or --database):
+
+    $ python -m benchmarks.endpoints --students 10000 --logs 1000000 --requests 500 --concurrency 4
+
+Against a running server whose database was seeded with benchmarks.datagen:
+
+    $ FLASK_RESPONSE_CACHE_BACKEND=none gunicorn wsgi:app -c gunicorn_config.py
+    $ python -m benchmarks.endpoints --url http://localhost:8080 --compare benchmarks/results/<earlier run>.json
+
+SQL statements per request are only counted in process. In process runs turn the response
+cache off (--config RESPONSE_CACHE_BACKEND=memory puts it back); start a server under test
+with FLASK_RESPONSE_CACHE_BACKEND=none for the same.
+"""
+import argparse, json, os, random, subprocess, tempfile, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from sqlalchemy import event
+from tabulate import tabulate
+
+from App.main import create_app
+from App.database import db, create_db
+from benchmarks.datagen import BENCH_PASSWORD, parse_status_mix, seed, staff_username, student_username
+
+SCENARIOS = ('leaderboard', 'staff_pending', 'student_logs', 'login', 'request_hours', 'confirm', 'deny')
+PERCENTILES = (50, 95, 99)
+
+
+class AppTarget:
+    # Sends requests through Flask test clients, one per thread, and counts SQL statements
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+        self.statements = 0
+        self.lock = threading.Lock()
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        with self.lock:
+            self.statements += 1
+
+    def request(self, method, path, token=None, body=None):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpTarget:
+    # Sends requests to a running server. Statements are not counted.
+
+    statements = None
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = json.dumps(body).encode() if body is not None else None
+        try:
+            with urlopen(Request(self.url + path, data=data, headers=headers, method=method)) as response:
+                status, payload = response.status, response.read()
+        except HTTPError as error:
+            status, payload = error.code, error.read()
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+
+def log_in(target, username):
+    status, body = target.request('POST', '/api/login', body={'username': username, 'password': BENCH_PASSWORD})
+    if status != 200:
+        raise SystemExit(f"Could not log in as {username} ({status}). Was the database seeded with benchmarks.datagen?")
+    return body['access_token']
+
+
+def pending_log_ids(target, token, count):
+    # Oldest pending logs first, as many as the confirm and deny runs will review
+    ids, page = [], 1
+    while len(ids) < count:
+        status, logs = target.request('GET', f'/staff/pending?page={page}&per_page=100', token)
+        if status != 200 or not logs:
+            break
+        ids.extend(log['id'] for log in logs)
+        page += 1
+    return deque(ids[:count])
+
+
+def scenario_requests(name, rng, students, staff, pending):
+    # Returns a function making the (method, path, token, body) of the scenario's next request
+    if name == 'leaderboard':
+        return lambda: ('GET', '/leaderboard', None, None)
+    if name == 'staff_pending':
+        return lambda: ('GET', f'/staff/pending?page={rng.randint(1, 5)}', rng.choice(staff), None)
+    if name == 'student_logs':
+        return lambda: ('GET', '/student/logs?page=1', rng.choice(students), None)
+    if name == 'login':
+        return lambda: ('POST', '/api/login', None, {'username': student_username(rng.randrange(len(students))), 'password': BENCH_PASSWORD})
+    if name == 'request_hours':
+        return lambda: ('POST', '/student/request_hours', rng.choice(students), {'hours': rng.randint(1, 8)})
+
+    action = 'confirm' if name == 'confirm' else 'deny'
+
+    def review():
+        # Each log is reviewed once; a run that outlasts the queue reviews a missing log (400)
+        try:
+            log_id = pending.popleft()
+        except IndexError:
+            log_id = 0
+        return 'PUT', f'/staff/{action}/{log_id}', rng.choice(staff), None
+    return review
+
+
+def percentile(latencies, p):
+    # Nearest rank, like the review turnaround percentiles in App/controllers/report.py
+    return latencies[max(0, -(-len(latencies) * p // 100) - 1)]
+
+
+def run_scenario(target, name, next_request, count, concurrency):
+    lock = threading.Lock()
+    results = []
+    statements_before = target.statements
+
+    def worker(n):
+        for _ in range(n):
+            with lock:
+                method, path, token, body = next_request()
+            start = time.perf_counter()
+            status, _ = target.request(method, path, token, body)
+            elapsed = time.perf_counter() - start
+            with lock:
+                results.append((status, elapsed))
+
+    shares = [count // concurrency + (1 if i < count % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, shares))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in results)
+    result = {
+        'scenario': name,
+        'requests': len(results),
+        'errors': sum(1 for status, _ in results if status >= 400),
+        'requests_per_second': len(results) / elapsed,
+        **{f'p{p}_ms': percentile(latencies, p) * 1000 for p in PERCENTILES},
+        'queries_per_request': None
+    }
+    if target.statements is not None:
+        result['queries_per_request'] = (target.statements - statements_before) / len(results)
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    previous = {result['scenario']: result for result in (baseline or {}).get('results', [])}
+    rows = []
+    for result in results:
+        row = [
+            result['scenario'], result['requests'], result['errors'], f"{result['requests_per_second']:.1f}",
+            *[f"{result[f'p{p}_ms']:.1f}" for p in PERCENTILES],
+            "-" if result['queries_per_request'] is None else f"{result['queries_per_request']:.1f}"
+        ]
+        if baseline is not None:
+            before = previous.get(result['scenario'])
+            row.append(f"{result['p95_ms'] / before['p95_ms']:.2f}x" if before and before['p95_ms'] else "-")
+        rows.append(row)
+
+    headers = ["Scenario", "Requests", "Errors", "Req/s", *[f"p{p} ms" for p in PERCENTILES], "SQL/Request"]
+    if baseline is not None:
+        headers.append(f"p95 vs {baseline.get('commit') or 'baseline'}")
+    print(tabulate(rows, headers=headers, tablefmt="grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help="Base URL of a running server instead of an in-process app")
+    parser.add_argument('--database', default=None,
+                        help="SQLAlchemy URI to seed and run against in process, e.g. the docker-compose PostgreSQL. "
+                             "Its tables are dropped first (default: a temporary SQLite file)")
+    parser.add_argument('--students', type=int, default=1000, help="Students to seed, or seeded on the server")
+    parser.add_argument('--staff', type=int, default=20, help="Staff to seed, or seeded on the server")
+    parser.add_argument('--logs', type=int, default=100000, help="Hour logs to seed (in process only)")
+    parser.add_argument('--status-mix', type=parse_status_mix, default=(0.2, 0.7, 0.1),
+                        help="Share of each seeded log status, e.g. requested=0.2,confirmed=0.7,denied=0.1")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS), help="Scenarios to run")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per scenario")
+    parser.add_argument('--concurrency', type=int, default=1, help="Clients sending requests at once")
+    parser.add_argument('--users', type=int, default=20, help="Students and staff logged in up front to send requests as")
+    parser.add_argument('--config', nargs='*', default=[], metavar='KEY=VALUE',
+                        help="App config overrides for in-process runs, values parsed as JSON when possible")
+    parser.add_argument('--output', default=None, help="JSON results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument('--compare', default=None, help="Earlier JSON results file to compare p95 latency against")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    # Measure the queries rather than cached responses, unless --config asks for a cache
+    config = {'RESPONSE_CACHE_BACKEND': 'none'}
+    for item in args.config:
+        key, _, value = item.partition('=')
+        try:
+            config[key] = json.loads(value)
+        except ValueError:
+            config[key] = value
+
+    if args.url:
+        target = HttpTarget(args.url)
+    else:
+        database = args.database or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+        app = create_app({'SQLALCHEMY_DATABASE_URI': database, **config})
+        db.drop_all()
+        create_db()
+        timings = seed(args.students, args.staff, args.logs, args.status_mix, random_seed=args.seed)
+        print("Seeded in " + ", ".join(f"{step} {seconds:.1f}s" for step, seconds in timings.items()))
+        target = AppTarget(app)
+
+    rng = random.Random(args.seed)
+    students = [log_in(target, student_username(i)) for i in rng.sample(range(args.students), min(args.users, args.students))]
+    staff = [log_in(target, staff_username(i)) for i in rng.sample(range(args.staff), min(args.users, args.staff))]
+
+    reviews = args.requests * sum(1 for name in args.scenarios if name in ('confirm', 'deny'))
+    pending = pending_log_ids(target, staff[0], reviews) if reviews else deque()
+
+    results = []
+    for name in args.scenarios:
+        next_request = scenario_requests(name, rng, students, staff, pending)
+        results.append(run_scenario(target, name, next_request, args.requests, args.concurrency))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as stream:
+            baseline = json.load(stream)
+    print_results(results, baseline)
+
+    commit = git_commit()
+    finished = datetime.now(timezone.utc)
+    run = {
+        'commit': commit,
+        'timestamp': finished.isoformat(timespec='seconds'),
+        'target': args.url or 'in-process',
+        'database': None if args.url else app.config['SQLALCHEMY_DATABASE_URI'].split('://')[0],
+        'settings': {key: getattr(args, key) for key in ('students', 'staff', 'logs', 'status_mix', 'requests', 'concurrency', 'users', 'seed')},
+        'config': config,
+        'results': results
+    }
+    output = args.output or os.path.join('benchmarks', 'results', f"{commit or 'unknown'}-{finished:%Y%m%d%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as stream:
+        json.dump(run, stream, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Compares gunicorn's sync and gevent workers on I/O-bound endpoints. Each SQL statement
+waits --db-latency-ms first (a sleep that gevent makes cooperative), standing in for the
+network round trip to a remote PostgreSQL, while many clients poll at once.
+
+    $ python -m benchmarks.gevent_workers --workers 2 --clients 50 --requests 400 --db-latency-ms 5
+"""
+import argparse, os, random, subprocess, sys, tempfile, time
+from urllib.request import urlopen
+
+from sqlalchemy import event
+from tabulate import tabulate
+
+from App.main import create_app
+from App.database import db, create_db
+from benchmarks.datagen import seed, staff_username, student_username
+from benchmarks.endpoints import HttpTarget, log_in, run_scenario, scenario_requests
+
+WORKER_CLASSES = ('sync', 'gevent')
+SCENARIOS = ('student_logs', 'staff_pending')
+
+
+def latency_app():
+    # gunicorn entry point: the app with BENCH_DB_LATENCY_MS of delay before every statement
+    app = create_app()
+    latency = float(os.environ.get('BENCH_DB_LATENCY_MS', 0)) / 1000
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: time.sleep(latency))
+    return app
+
+
+def start_server(worker_class, args, database, port):
+    env = dict(
+        os.environ,
+        GUNICORN_WORKER_CLASS=worker_class,
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        FLASK_SQLALCHEMY_DATABASE_URI=database,
+        BENCH_DB_LATENCY_MS=str(args.db_latency_ms),
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'benchmarks.gevent_workers:latency_app()', '-c', 'gunicorn_config.py',
+         '--access-logfile', '/dev/null'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            with urlopen(f"{url}/health"):
+                return server, url
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise SystemExit(f"gunicorn with {worker_class} workers did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument('--clients', type=int, default=50, help="Clients polling at once")
+    parser.add_argument('--requests', type=int, default=400, help="Requests per scenario and worker class")
+    parser.add_argument('--db-latency-ms', type=float, default=5, help="Simulated round trip before each SQL statement")
+    parser.add_argument('--students', type=int, default=1000, help="Students to seed")
+    parser.add_argument('--logs', type=int, default=50000, help="Hour logs to seed")
+    parser.add_argument('--port', type=int, default=8097, help="Port for the gunicorn under test")
+    args = parser.parse_args()
+
+    database = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    create_app({'SQLALCHEMY_DATABASE_URI': database})
+    create_db()
+    seed(args.students, 5, args.logs)
+    db.session.remove()
+
+    rows = []
+    for worker_class in WORKER_CLASSES:
+        server, url = start_server(worker_class, args, database, args.port)
+        try:
+            target = HttpTarget(url)
+            students = [log_in(target, student_username(i)) for i in range(5)]
+            staff = [log_in(target, staff_username(i)) for i in range(5)]
+            for name in SCENARIOS:
+                next_request = scenario_requests(name, random.Random(0), students, staff, None)
+                result = run_scenario(target, name, next_request, args.requests, args.clients)
+                rows.append([
+                    worker_class, name, f"{result['requests_per_second']:.0f}", f"{result['p50_ms']:.0f}",
+                    f"{result['p95_ms']:.0f}", f"{result['p99_ms']:.0f}", result['errors']
+                ])
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(tabulate(rows, headers=["Worker", "Scenario", "Req/s", "p50 ms", "p95 ms", "p99 ms", "Errors"], tablefmt="grid"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Measures /api/login throughput at several PASSWORD_HASH_METHOD cost settings, with many
+clients logging in at once so the hashing pool's limits and 503 backpressure show up.
+
+    $ python -m benchmarks.password_hashing --clients 16 --logins 20
+"""
+import argparse, os, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+
+from tabulate import tabulate
+
+from App.main import create_app
+from App.database import create_db
+from App.controllers import create_user
+
+METHODS = ["pbkdf2:sha256:100000", "pbkdf2:sha256:600000", "scrypt:16384:8:1", "scrypt:32768:8:1"]
+
+
+def run(method, clients, logins, max_concurrent):
+    db_file = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_file}',
+        'PASSWORD_HASH_METHOD': method,
+        'PASSWORD_HASH_MAX_CONCURRENT': max_concurrent,
+    })
+    create_db()
+    create_user('benchuser', 'benchpass', 'student')
+
+    def client_logins(_):
+        client = app.test_client()
+        results = []
+        for _ in range(logins):
+            start = time.perf_counter()
+            status = client.post('/api/login', json={'username': 'benchuser', 'password': 'benchpass'}).status_code
+            results.append((status, time.perf_counter() - start))
+        return results
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        results = [r for client_results in pool.map(client_logins, range(clients)) for r in client_results]
+    elapsed = time.perf_counter() - start
+
+    ok = sorted(latency for status, latency in results if status == 200)
+    busy = sum(1 for status, _ in results if status == 503)
+    p95 = ok[int(len(ok) * 0.95) - 1] * 1000 if ok else float('nan')
+    return [method, f"{len(ok) / elapsed:.1f}", f"{p95:.0f}", busy]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=16, help="Concurrent clients")
+    parser.add_argument('--logins', type=int, default=20, help="Logins per client")
+    parser.add_argument('--max-concurrent', type=int, default=(os.cpu_count() or 1) * 4,
+                        help="PASSWORD_HASH_MAX_CONCURRENT for the run")
+    parser.add_argument('--methods', nargs='+', default=METHODS, help="Hash methods to compare")
+    args = parser.parse_args()
+
+    rows = [run(method, args.clients, args.logins, args.max_concurrent) for method in args.methods]
+    print(tabulate(rows, headers=["Hash method", "Logins/sec", "p95 ms", "503s"], tablefmt="grid"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Compares the default SQLite settings with the SQLITE_TUNED profile (WAL, busy timeout,
+tuned pragmas and BEGIN IMMEDIATE writes) under concurrent confirm_hours writers and
+pending queue readers, each in its own process like gunicorn workers.
+
+    $ python -m benchmarks.sqlite_concurrency --writers 4 --readers 4 --confirms 200
+"""
+import argparse, multiprocessing, os, tempfile, time
+
+from sqlalchemy.exc import OperationalError
+from tabulate import tabulate
+
+from App.main import create_app
+from App.database import db, create_db
+from App.models import HourLog, Staff
+from benchmarks.datagen import seed
+from benchmarks.endpoints import percentile
+
+PROFILES = {'default': {}, 'tuned': {'SQLITE_TUNED': True}}
+
+
+def writer(uri, config, staff_id, log_ids, results):
+    create_app({'SQLALCHEMY_DATABASE_URI': uri, **config})
+    from App.controllers import confirm_hours
+    latencies, errors = [], 0
+    for log_id in log_ids:
+        start = time.perf_counter()
+        try:
+            confirm_hours(staff_id, log_id)
+        except OperationalError:
+            db.session.rollback()
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    results.put(('write', latencies, errors))
+
+
+def reader(uri, config, stop, results):
+    create_app({'SQLALCHEMY_DATABASE_URI': uri, **config})
+    from App.controllers import get_pending_queue
+    latencies, errors = [], 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            get_pending_queue(page=1, per_page=50)
+            db.session.commit()
+        except OperationalError:
+            db.session.rollback()
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    results.put(('read', latencies, errors))
+
+
+def run(profile, args):
+    uri = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    config = PROFILES[profile]
+    create_app({'SQLALCHEMY_DATABASE_URI': uri, **config})
+    create_db()
+    seed(args.students, args.writers, args.logs, (1, 0, 0))
+    staff_ids = db.session.scalars(db.select(Staff.id).order_by(Staff.id)).all()
+    log_ids = db.session.scalars(db.select(HourLog.id).order_by(HourLog.id).limit(args.writers * args.confirms)).all()
+    db.session.remove()
+
+    context = multiprocessing.get_context('spawn')
+    results, stop = context.Queue(), context.Event()
+    readers = [context.Process(target=reader, args=(uri, config, stop, results)) for _ in range(args.readers)]
+    writers = [
+        context.Process(target=writer, args=(uri, config, staff_id, log_ids[i::args.writers], results))
+        for i, staff_id in enumerate(staff_ids)
+    ]
+    for process in readers:
+        process.start()
+    start = time.perf_counter()
+    for process in writers:
+        process.start()
+    outcomes = [results.get() for _ in writers]
+    elapsed = time.perf_counter() - start
+    stop.set()
+    outcomes += [results.get() for _ in readers]
+    for process in readers + writers:
+        process.join()
+
+    row = [profile]
+    for kind in ('write', 'read'):
+        latencies = sorted(latency for k, batch, _ in outcomes if k == kind for latency in batch)
+        errors = sum(count for k, _, count in outcomes if k == kind)
+        row += [
+            f"{len(latencies) / elapsed:.0f}",
+            f"{percentile(latencies, 50) * 1000:.1f}" if latencies else "-",
+            f"{percentile(latencies, 95) * 1000:.1f}" if latencies else "-",
+            errors
+        ]
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=4, help="Processes confirming logs, one staff member each")
+    parser.add_argument('--readers', type=int, default=4, help="Processes reading the pending queue meanwhile")
+    parser.add_argument('--confirms', type=int, default=200, help="Logs each writer confirms")
+    parser.add_argument('--students', type=int, default=1000, help="Students to seed")
+    parser.add_argument('--logs', type=int, default=20000, help="Requested hour logs to seed")
+    parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES), help="Profiles to compare")
+    args = parser.parse_args()
+    args.logs = max(args.logs, args.writers * args.confirms)
+
+    rows = [run(profile, args) for profile in args.profiles]
+    print(tabulate(rows, headers=[
+        "Profile", "Confirms/sec", "Confirm p50 ms", "Confirm p95 ms", "Confirm errors",
+        "Reads/sec", "Read p50 ms", "Read p95 ms", "Read errors"
+    ], tablefmt="grid"))
+
+
+if __name__ == '__main__':
+    main()
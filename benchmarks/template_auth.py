@@ -0,0 +1,71 @@
+"""
+Compares the lazy template auth context with the eager one it replaced, which verified
+the JWT and queried the user on every render.
+
+    $ python -m benchmarks.template_auth --requests 500
+"""
+import argparse, contextlib, io, os, tempfile, time
+
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from tabulate import tabulate
+
+from App.main import create_app
+from App.database import db, create_db
+from App.models import User
+from App.controllers import create_user, login
+
+
+def eager_inject_user():
+    # The previous context processor, kept as the baseline
+    try:
+        verify_jwt_in_request()
+        identity = get_jwt_identity()
+        user_id = int(identity) if identity is not None else None
+        current_user = db.session.get(User, user_id) if user_id is not None else None
+        is_authenticated = current_user is not None
+    except Exception as e:
+        print(e)
+        is_authenticated = False
+        current_user = None
+    return dict(is_authenticated=is_authenticated, current_user=current_user)
+
+
+def requests_per_second(client, path, headers, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        client.get(path, headers=headers)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500, help="Requests per path and mode")
+    args = parser.parse_args()
+
+    db_file = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_file}'})
+    create_db()
+    for i in range(50):
+        create_user(f'benchuser{i}', 'pass', 'student')
+    token = login('benchuser0', 'pass')
+
+    client = app.test_client()
+    processors = app.template_context_processors[None]
+    lazy_processor = processors[-1]
+    callers = {'anonymous': {}, 'logged in': {'Authorization': f'Bearer {token}'}}
+
+    rows = []
+    for path in ['/', '/users']:
+        for caller, headers in callers.items():
+            processors[-1] = eager_inject_user
+            with contextlib.redirect_stdout(io.StringIO()):
+                eager = requests_per_second(client, path, headers, args.requests)
+            processors[-1] = lazy_processor
+            lazy = requests_per_second(client, path, headers, args.requests)
+            rows.append([path, caller, f"{eager:.0f}", f"{lazy:.0f}", f"{lazy / eager:.2f}x"])
+
+    print(tabulate(rows, headers=["Path", "Caller", "Eager req/s", "Lazy req/s", "Speedup"], tablefmt="grid"))
+
+
+if __name__ == '__main__':
+    main()
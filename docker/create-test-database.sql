@@ -0,0 +1,2 @@
+-- Separate database for the test suite, which drops every table when it finishes
+CREATE DATABASE app_test OWNER app;
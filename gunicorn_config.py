@@ -1,19 +1,40 @@
 # gunicorn_config.py
-import multiprocessing
+import multiprocessing, os
+
+# Only settings are imported here: loading the app in the master, before gevent patches
+# the standard library in each worker, would leave it using blocking sockets and locks.
 
 # The socket to bind.
-# "0.0.0.0" to bind to all interfaces. 8000 is the port number.
-bind = "0.0.0.0:8080"
+# "0.0.0.0" to bind to all interfaces. 8080 is the port number.
+bind = os.environ.get('GUNICORN_BIND', "0.0.0.0:8080")
+
+# The number of worker processes for handling requests: WEB_CONCURRENCY (set by Render
+# and Heroku) or 2 x CPUs + 1.
+workers = int(os.environ.get('WEB_CONCURRENCY') or multiprocessing.cpu_count() * 2 + 1)
 
-# The number of worker processes for handling requests.
-workers = 4
+# Use the 'gevent' worker type for async performance. gunicorn patches the standard
+# library in each worker before loading the app; set GUNICORN_WORKER_CLASS=sync to opt out.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
 
-# Use the 'gevent' worker type for async performance.
-worker_class = 'gevent'
+# Requests one gevent worker serves at once. Each may hold a database connection, so
+# keep workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) within the database's max_connections.
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Serve each request in its own app context, so Flask-SQLAlchemy gives every request
+# (greenlet) its own session, instead of sharing the one create_app pushes for the CLI.
+raw_env = [f"FLASK_PUSH_APP_CONTEXT={os.environ.get('FLASK_PUSH_APP_CONTEXT', 'false')}"]
 
 # Log level
 loglevel = 'info'
 
 # Where to log to
 accesslog = '-'  # '-' means log to stdout
-errorlog = '-'  # '-' means log to stderr
\ No newline at end of file
+errorlog = '-'  # '-' means log to stderr
+
+# With preload_app the app, and its database connection pool, is created in the master
+# before forking. Each worker drops the inherited connections and opens its own.
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from wsgi import app
+        from App.database import dispose_engines
+        dispose_engines(app)
@@ -0,0 +1,70 @@
+"""baseline schema
+
+Revision ID: 0d49f61f833a
+Revises: 
+Create Date: 2026-10-18 08:41:12.959626
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d49f61f833a'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tables as originally created by `flask init` / db.create_all().
+    # Databases created that way can be brought under migrations with `flask db stamp 0d49f61f833a`.
+    op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=20), nullable=False),
+        sa.Column('password', sa.String(length=256), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username')
+    )
+    op.create_table('staff',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('students',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('total_hours', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('accolades',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=True),
+        sa.Column('milestone', sa.Integer(), nullable=False),
+        sa.Column('awarded_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('hour_logs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=True),
+        sa.Column('staff_id', sa.Integer(), nullable=True),
+        sa.Column('hours', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('reviewed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['staff_id'], ['staff.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+
+def downgrade():
+    op.drop_table('hour_logs')
+    op.drop_table('accolades')
+    op.drop_table('students')
+    op.drop_table('staff')
+    op.drop_table('users')
+
@@ -0,0 +1,48 @@
+"""hour rollups
+
+Revision ID: 4aa1fbfb7da0
+Revises: 7b3e5c91d0a4
+Create Date: 2026-10-18 09:06:13.093709
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4aa1fbfb7da0'
+down_revision = '7b3e5c91d0a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('hour_rollups',
+        sa.Column('scope', sa.String(length=10), nullable=False),
+        sa.Column('scope_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('confirmed_hours', sa.Integer(), nullable=False),
+        sa.Column('confirmed_count', sa.Integer(), nullable=False),
+        sa.Column('request_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('scope', 'scope_id', 'day')
+    )
+
+    # Requests count on the day they were created (hours logged directly by staff have
+    # reviewed_at <= created_at), confirmed hours on the day they were reviewed
+    op.execute(
+        "INSERT INTO hour_rollups (scope, scope_id, day, confirmed_hours, confirmed_count, request_count) "
+        "SELECT scope, scope_id, day, SUM(confirmed_hours), SUM(confirmed_count), SUM(request_count) FROM ("
+        "SELECT 'all' AS scope, 0 AS scope_id, date(created_at) AS day, 0 AS confirmed_hours, 0 AS confirmed_count, 1 AS request_count "
+        "FROM hour_logs WHERE reviewed_at IS NULL OR reviewed_at > created_at "
+        "UNION ALL SELECT 'student', student_id, date(created_at), 0, 0, 1 "
+        "FROM hour_logs WHERE reviewed_at IS NULL OR reviewed_at > created_at "
+        "UNION ALL SELECT 'all', 0, date(reviewed_at), hours, 1, 0 FROM hour_logs WHERE status = 'confirmed' "
+        "UNION ALL SELECT 'student', student_id, date(reviewed_at), hours, 1, 0 FROM hour_logs WHERE status = 'confirmed' "
+        "UNION ALL SELECT 'staff', staff_id, date(reviewed_at), hours, 1, 0 FROM hour_logs WHERE status = 'confirmed' AND staff_id IS NOT NULL"
+        ") AS contributions WHERE scope_id IS NOT NULL GROUP BY scope, scope_id, day"
+    )
+
+
+
+def downgrade():
+    op.drop_table('hour_rollups')
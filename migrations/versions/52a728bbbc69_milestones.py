@@ -0,0 +1,35 @@
+"""milestones
+
+Revision ID: 52a728bbbc69
+Revises: 537347d88d27
+Create Date: 2026-10-18 08:47:00.209149
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '52a728bbbc69'
+down_revision = '537347d88d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    milestones = op.create_table('milestones',
+        sa.Column('threshold', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('badge', sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint('threshold')
+    )
+    # The tiers that used to be hard-coded in award_accolades
+    op.bulk_insert(milestones, [
+        {'threshold': 10, 'name': 'Bronze'},
+        {'threshold': 20, 'name': 'Silver'},
+        {'threshold': 50, 'name': 'Gold'},
+    ])
+
+
+def downgrade():
+    op.drop_table('milestones')
@@ -0,0 +1,38 @@
+"""access path indexes
+
+Revision ID: 537347d88d27
+Revises: 9e987e06d1c9
+Create Date: 2026-10-18 08:41:16.999515
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '537347d88d27'
+down_revision = '9e987e06d1c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('hour_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_hour_logs_status_created_at', ['status', 'created_at'], unique=False)
+        batch_op.create_index('ix_hour_logs_student_id_created_at', ['student_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_hour_logs_staff_id_reviewed_at', ['staff_id', 'reviewed_at'], unique=False)
+
+    with op.batch_alter_table('accolades', schema=None) as batch_op:
+        batch_op.create_index('uq_accolades_student_id_milestone', ['student_id', 'milestone'], unique=True)
+
+
+
+def downgrade():
+    with op.batch_alter_table('accolades', schema=None) as batch_op:
+        batch_op.drop_index('uq_accolades_student_id_milestone')
+
+    with op.batch_alter_table('hour_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_hour_logs_staff_id_reviewed_at')
+        batch_op.drop_index('ix_hour_logs_student_id_created_at')
+        batch_op.drop_index('ix_hour_logs_status_created_at')
+
@@ -0,0 +1,27 @@
+"""review time index
+
+Revision ID: 7b3e5c91d0a4
+Revises: 2608d978e7fb
+Create Date: 2026-10-18 09:24:52.740113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e5c91d0a4'
+down_revision = '2608d978e7fb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('hour_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_hour_logs_reviewed_at', ['reviewed_at'], unique=False)
+
+
+
+def downgrade():
+    with op.batch_alter_table('hour_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_hour_logs_reviewed_at')
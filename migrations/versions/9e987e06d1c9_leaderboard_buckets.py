@@ -0,0 +1,40 @@
+"""leaderboard buckets
+
+Revision ID: 9e987e06d1c9
+Revises: 0d49f61f833a
+Create Date: 2026-10-18 08:41:15.041490
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e987e06d1c9'
+down_revision = '0d49f61f833a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leaderboard_buckets',
+        sa.Column('total_hours', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('student_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('total_hours')
+    )
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.create_index('ix_students_total_hours_id', ['total_hours', 'id'], unique=False)
+
+    op.execute(
+        "INSERT INTO leaderboard_buckets (total_hours, student_count) "
+        "SELECT total_hours, COUNT(id) FROM students GROUP BY total_hours"
+    )
+
+
+
+def downgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index('ix_students_total_hours_id')
+
+    op.drop_table('leaderboard_buckets')
+
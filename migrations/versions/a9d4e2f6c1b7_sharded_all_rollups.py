@@ -0,0 +1,32 @@
+"""sharded all rollups
+
+Revision ID: a9d4e2f6c1b7
+Revises: f7a2c6e1d9b4
+Create Date: 2026-10-18 12:41:06.218845
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e2f6c1b7'
+down_revision = 'f7a2c6e1d9b4'
+branch_labels = None
+depends_on = None
+
+# ROLLUP_ALL_SHARDS when this revision was written
+SHARDS = 16
+
+
+def upgrade():
+    # Totals for everyone, one row per day and shard of student ids
+    op.execute(
+        "INSERT INTO hour_rollups (scope, scope_id, day, confirmed_hours, confirmed_count, request_count) "
+        f"SELECT 'all', scope_id % {SHARDS}, day, SUM(confirmed_hours), SUM(confirmed_count), SUM(request_count) "
+        f"FROM hour_rollups WHERE scope = 'student' GROUP BY scope_id % {SHARDS}, day"
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM hour_rollups WHERE scope = 'all'")
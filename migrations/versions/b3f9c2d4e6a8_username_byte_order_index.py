@@ -0,0 +1,27 @@
+"""username byte order index
+
+Revision ID: b3f9c2d4e6a8
+Revises: e5d8a1c3b7f2
+Create Date: 2026-10-18 11:20:41.506127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f9c2d4e6a8'
+down_revision = 'e5d8a1c3b7f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Prefix searches compare usernames COLLATE "C"; SQLite's unique index already does
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index('ix_users_username_c', 'users', [sa.text('username COLLATE "C"')], unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_users_username_c', table_name='users')
@@ -0,0 +1,27 @@
+"""user directory index
+
+Revision ID: c4f1a7d2e9b3
+Revises: 52a728bbbc69
+Create Date: 2026-10-18 09:12:40.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f1a7d2e9b3'
+down_revision = '52a728bbbc69'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_role_id', ['role', 'id'], unique=False)
+
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_role_id')
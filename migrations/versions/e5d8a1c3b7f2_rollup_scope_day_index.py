@@ -0,0 +1,33 @@
+"""rollup scope day index
+
+Revision ID: e5d8a1c3b7f2
+Revises: 4aa1fbfb7da0
+Create Date: 2026-10-18 10:02:17.318554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5d8a1c3b7f2'
+down_revision = '4aa1fbfb7da0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Totals for everyone are now summed from the student rows of each day
+    op.execute("DELETE FROM hour_rollups WHERE scope = 'all'")
+    with op.batch_alter_table('hour_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_hour_rollups_scope_day', ['scope', 'day'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('hour_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_hour_rollups_scope_day')
+    op.execute(
+        "INSERT INTO hour_rollups (scope, scope_id, day, confirmed_hours, confirmed_count, request_count) "
+        "SELECT 'all', 0, day, SUM(confirmed_hours), SUM(confirmed_count), SUM(request_count) "
+        "FROM hour_rollups WHERE scope = 'student' GROUP BY day"
+    )
@@ -0,0 +1,34 @@
+"""hour log requested flag
+
+Revision ID: f7a2c6e1d9b4
+Revises: b3f9c2d4e6a8
+Create Date: 2026-10-18 12:14:52.730418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a2c6e1d9b4'
+down_revision = 'b3f9c2d4e6a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('hour_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('requested', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+    # Hours logged directly by staff were written with reviewed_at <= created_at
+    hour_logs = sa.table('hour_logs', sa.column('requested', sa.Boolean), sa.column('created_at'), sa.column('reviewed_at'))
+    op.execute(
+        hour_logs.update()
+        .where(hour_logs.c.reviewed_at.is_not(None), hour_logs.c.reviewed_at <= hour_logs.c.created_at)
+        .values(requested=False)
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('hour_logs', schema=None) as batch_op:
+        batch_op.drop_column('requested')
@@ -1,7 +1,8 @@
-import click, pytest, sys
+import click, json, pytest, sys
+from urllib.request import Request, urlopen
 from flask.cli import with_appcontext, AppGroup
 
-from App.database import db, get_migrate
+from App.database import db, get_migrate, explain
 
 #this is a test comment 
 
@@ -10,16 +11,25 @@ from App.models.student import *
 from App.models.staff import *
 from App.models.hour_log import *
 from App.models.accolade import *
+from App.models.leaderboard import *
+from App.models.milestone import *
 
 from App.controllers.user import *
 from App.controllers.student import *
 from App.controllers.staff import *
 from App.controllers.hour_log import *
 from App.controllers.accolade import *
+from App.controllers.leaderboard import *
+from App.controllers.hour_import import *
+from App.controllers.user_import import *
+from App.controllers.report import *
+from App.controllers.student_stats import *
+from App.controllers.hour_rollup import *
 
 
 
 from App.main import create_app
+from App.profiling import init_profiling, profile_report, reset_profiling
 from App.controllers import ( create_user, get_all_users_json, get_all_users, initialize )
 from tabulate import tabulate
 
@@ -55,14 +65,33 @@ def create_user_command(username, password, role):
         print("User creation failed!")
 
 
+# Command to create many accounts from a CSV with username, password and role columns
+# flask import-users <file>
+
+@app.cli.command("import-users", help="Create accounts from a .csv with username, password and role (default: student) columns.")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--chunk-size", type=click.IntRange(min=1), default=1000, help="Users created per transaction (default: 1000).")
+def import_users_command(file, chunk_size):
+    summary = import_users_file(file, chunk_size)
+
+    print(f"Created {summary['created']} users ({summary['students']} students, {summary['staff']} staff) with {summary['error_count']} errors.")
+    if summary['errors']:
+        table = [[e['line'], e['message']] for e in summary['errors']]
+        print(tabulate(table, headers=["Line", "Error"], tablefmt="grid"))
+
+
 # Command to list all users of filter by role
 # flask list
 # flask list --type <role>
+# flask list --prefix <username start> --limit <n> --after <user id>
 
 @app.cli.command("list", help="List all users in the system, or only those with a specific role.")
 @click.option("--type", default="all", help="Roles to filter by: student, staff or all (default: all).")
-def list_user_command(type):
-    users = list_users(type)
+@click.option("--prefix", default=None, help="Only users whose username starts with this.")
+@click.option("--limit", type=int, default=None, help="Users to show (default: all).")
+@click.option("--after", type=int, default=None, help="Only users with an ID after this one, to continue a previous page.")
+def list_user_command(type, prefix, limit, after):
+    users = list_users(type, prefix, after, limit)
     
     if not users:
         print("No users found!")
@@ -75,6 +104,28 @@ def list_user_command(type):
     print(tabulate(table, headers=["ID", "Username", "Role"], tablefmt="grid"))
     
 
+# Command to print the database query plans for the hottest controller queries
+# flask db-explain
+
+@app.cli.command("db-explain", help="Print query plans for the hot controller queries to confirm index use.")
+def db_explain_command():
+    hot_queries = {
+        "Pending queue": pending_queue_query(),
+        "Student hour logs": db.select(HourLog).where(HourLog.student_id == 1).order_by(HourLog.created_at),
+        "Staff reviewed logs": db.select(HourLog).where(HourLog.staff_id == 1).order_by(HourLog.reviewed_at),
+        "Accolade check": db.select(Accolade).where(Accolade.student_id == 1, Accolade.milestone == 10),
+        "Leaderboard top 10": ranked_leaderboard_query().order_by(Student.total_hours.desc(), Student.id).limit(10),
+        "Staff directory page": user_directory_query("staff", after_id=1).limit(50),
+        "Username search": user_directory_query(prefix="al").limit(50),
+    }
+
+    for name, query in hot_queries.items():
+        print(name)
+        for line in explain(query):
+            print(f"    {line}")
+        print()
+
+
 
 """---------------- User Commands ----------------"""
 # Commands that can be used by all users
@@ -86,15 +137,110 @@ def list_user_command(type):
 # flask user leaderboard
 
 @app.cli.command("leaderboard", help="View student leaderboard ranked by total confirmed hours logged.")
-def leaderboard_command():
-    leaderboard = get_leaderboard()
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Number of students per page (default: show everyone).")
+@click.option("--after", default=None, help="Cursor printed below the previous page, to show the page after it.")
+def leaderboard_command(limit, after):
+    next_cursor = None
+    if limit or after:
+        try:
+            cursor = decode_leaderboard_cursor(after) if after else None
+        except ValueError:
+            print("Invalid cursor!")
+            return
+        limit = limit or 20
+        rows = get_leaderboard_after(cursor, limit)
+        leaderboard = [[row.rank, row.username, row.total_hours] for row in rows]
+        next_cursor = encode_leaderboard_cursor(rows[-1]) if len(rows) == limit else None
+    else:
+        leaderboard = get_leaderboard()
 
     if leaderboard:
         print("Student Leaderboard")
         print(tabulate(leaderboard, headers=["Rank", "Student", "Total Hours"], tablefmt="grid"))
+        if next_cursor:
+            print(f"Next page: --after {next_cursor}")
     else:
         print("No students found!")
 
+
+# Command to recompute the leaderboard rank index from student totals
+# flask rebuild-leaderboard
+
+@app.cli.command("rebuild-leaderboard", help="Recompute the leaderboard rank index from student hour totals.")
+def rebuild_leaderboard_command():
+    buckets = rebuild_leaderboard()
+    print(f"Leaderboard rebuilt with {buckets} distinct hour totals!")
+
+
+# Command to recompute every student's log summary and check it against the hour logs
+# flask rebuild-stats
+# flask rebuild-stats --check
+
+@app.cli.command("rebuild-stats", help="Recompute student log summaries from the hour logs and verify them.")
+@click.option("--check", is_flag=True, help="Only report students whose summaries are out of date.")
+def rebuild_stats_command(check):
+    drifted = verify_student_stats()
+    print(f"{len(drifted)} student summaries out of date" + (f": {drifted[:20]}" if drifted else "."))
+    if check:
+        return
+
+    rows = rebuild_student_stats()
+    remaining = verify_student_stats()
+    if remaining:
+        print(f"Rebuilt {rows} summaries but {len(remaining)} still differ: {remaining[:20]}")
+    else:
+        print(f"Rebuilt and verified {rows} student summaries!")
+
+
+# Command to recompute the daily hour rollups behind the hours-over-time reports
+# flask rebuild-rollups
+
+@app.cli.command("rebuild-rollups", help="Recompute the daily confirmed hours and request rollups from the hour logs.")
+def rebuild_rollups_command():
+    rows = rebuild_hour_rollups()
+    print(f"Hour rollups rebuilt with {rows} rows!")
+
+
+# Command to chart hours over time for everyone, one student or one staff member
+# flask hours-report --granularity week --student-id 1
+
+@app.cli.command("hours-report", help="Show confirmed hours and requests per day, week or month.")
+@click.option("--granularity", type=click.Choice(ROLLUP_GRANULARITIES), default="day", help="Period length (default: day).")
+@click.option("--start", default=None, help="First date to include (YYYY-MM-DD).")
+@click.option("--end", default=None, help="Last date to include (YYYY-MM-DD).")
+@click.option("--student-id", type=int, default=None, help="Only this student's hours.")
+@click.option("--staff-id", type=int, default=None, help="Only hours this staff member confirmed.")
+def hours_report_command(granularity, start, end, student_id, staff_id):
+
+    try:
+        start = parse_report_date(start).date() if start else None
+        end = parse_report_date(end, end=True).date() if end else None
+    except (ValueError, OverflowError):
+        print("Dates must look like 2024-01-31!")
+        return
+    if student_id is not None and staff_id is not None:
+        print("Give --student-id or --staff-id, not both!")
+        return
+
+    try:
+        if student_id is not None:
+            series = get_hour_series(granularity, 'student', student_id, start, end)
+        elif staff_id is not None:
+            series = get_hour_series(granularity, 'staff', staff_id, start, end)
+        else:
+            series = get_hour_series(granularity, start=start, end=end)
+    except ValueError as e:
+        print(e)
+        return
+
+    if not series:
+        print("No hours found!")
+        return
+
+    table = [[p['period'], p['confirmed_hours'], p['confirmed_count'], p['request_count']] for p in series]
+    print(tabulate(table, headers=["Period", "Hours Confirmed", "Logs Confirmed", "Requests"], tablefmt="grid"))
+
+
 #app.cli.add_command(user_cli)
 
 
@@ -123,24 +269,24 @@ def request_hours_command(student_id, hours):
 
 # Command to view personal log (shows all hours requested/confirmed/denied for student)
 # flask student view-log <student_id>
+# flask student view-log <student_id> --status requested --page 1
 
 @app.cli.command("view-log", help="View all logged hours, including requested, confirmed, and denied requests.")
 @click.argument("student_id", type=int)
-def view_student_requests_command(student_id):
+@click.option("--status", type=click.Choice(["requested", "confirmed", "denied"]), default=None, help="Only show logs with this status.")
+@click.option("--page", type=click.IntRange(min=1), default=None, help="Page of logs to show (default: all logs).")
+@click.option("--per-page", type=click.IntRange(min=1), default=50, help="Logs per page when --page is given (default: 50).")
+def view_student_requests_command(student_id, status, page, per_page):
 
-    logs = get_student_logs(student_id)
+    student = get_student(student_id)
+    logs = get_student_log_page(student_id, status, page, per_page) if student else None
     if logs:
         table = []
         for log in logs:
-            if log.staff:
-                staff_name = log.staff.username
-            else:
-                staff_name = "pending"
-    
-            row = [log.id, log.hours, log.status, staff_name, log.format_created_time(), log.format_reviewed_time()]
+            row = [log.id, log.hours, log.status, log.staff or "pending", format_log_time(log.created_at), format_log_time(log.reviewed_at, "Not reviewed yet")]
             table.append(row)
 
-        print(f"Hour Logs for {log.student.username}:")
+        print(f"Hour Logs for {student.username}:")
         print(tabulate(table, headers=["Log ID", "Hours", "Status", "Confirmed By", "Requested At", "Reviewed At"], tablefmt="grid"))
     else:
         print("Invalid student ID or no logs found!")
@@ -166,6 +312,30 @@ def view_accolades_command(student_id):
     else:
         print("Invalid student ID or no accolades found!")
 
+
+# Command to view a summary of own hour logs
+# flask student view-stats <student_id>
+
+@app.cli.command("view-stats", help="View counts and hours of requested, confirmed and denied logs.")
+@click.argument("student_id", type=int)
+def view_stats_command(student_id):
+
+    student = get_student(student_id)
+    if not student:
+        print("Invalid student ID!")
+        return
+
+    stats = get_student_stats(student_id).get_json()
+    table = [
+        ["Pending", stats['pending_count'], stats['pending_hours']],
+        ["Confirmed", stats['confirmed_count'], stats['confirmed_hours']],
+        ["Denied", stats['denied_count'], stats['denied_hours']]
+    ]
+    print(f"Hour summary for {student.username}:")
+    print(tabulate(table, headers=["Status", "Logs", "Hours"], tablefmt="grid"))
+    print(f"Last request: {stats['last_requested_at'] or 'Never'}")
+    print(f"Last review: {stats['last_reviewed_at'] or 'Never'}")
+
         
 #app.cli.add_command(student_cli)
 
@@ -197,15 +367,17 @@ def log_hours_command(staff_id, student_id, hours):
 # flask staff view-all-requests
 
 @app.cli.command("view-all-requests", help="View all outstanding student requests.")
-def view_all_requests_command():
+@click.option("--page", type=click.IntRange(min=1), default=None, help="Page of the queue to show (default: whole queue).")
+@click.option("--per-page", type=click.IntRange(min=1), default=50, help="Requests per page when --page is given (default: 50).")
+@click.option("--order", type=click.Choice(["oldest", "newest"]), default="oldest", help="Queue order (default: oldest first).")
+def view_all_requests_command(page, per_page, order):
 
-    logs = get_pending_logs()
+    logs = get_pending_queue(page, per_page, newest_first=order == "newest")
 
     if logs:
         table = []
         for log in logs:
-            student_name = log.student.username
-            row = [log.id, student_name, log.hours, log.status, log.format_created_time(), log.format_reviewed_time()]
+            row = [log.id, log.student, log.hours, log.status, format_log_time(log.created_at), "Not reviewed yet"]
             table.append(row)
 
         print(tabulate(table, headers=["Log ID", "Student", "Hours", "Status", "Requested At", "Reviewed At"], tablefmt="grid"))
@@ -245,6 +417,215 @@ def deny_hours_command(staff_id, log_id):
         print("Invalid staff id or log id!")
 
 
+# Command to confirm many student requests in one transaction
+# flask staff confirm-hours-bulk <staff_id> <log_id> [<log_id> ...]
+@app.cli.command("confirm-hours-bulk", help="Confirm many students' requests for hours at once.")
+@click.argument("staff_id", type=int)
+@click.argument("log_ids", type=int, nargs=-1, required=True)
+def confirm_hours_bulk_command(staff_id, log_ids):
+
+    results = confirm_hours_bulk(staff_id, log_ids)
+
+    if results is None:
+        print("Invalid staff id!")
+        return
+    table = [[r['id'], "Confirmed" if r['success'] else r['message']] for r in results]
+    print(tabulate(table, headers=["Log ID", "Result"], tablefmt="grid"))
+
+
+# Command to deny many student requests in one transaction
+# flask staff deny-hours-bulk <staff_id> <log_id> [<log_id> ...]
+@app.cli.command("deny-hours-bulk", help="Deny many students' requests for hours at once.")
+@click.argument("staff_id", type=int)
+@click.argument("log_ids", type=int, nargs=-1, required=True)
+def deny_hours_bulk_command(staff_id, log_ids):
+
+    results = deny_hours_bulk(staff_id, log_ids)
+
+    if results is None:
+        print("Invalid staff id!")
+        return
+    table = [[r['id'], "Denied" if r['success'] else r['message']] for r in results]
+    print(tabulate(table, headers=["Log ID", "Result"], tablefmt="grid"))
+
+
+# Command to log hours for many students from a CSV or JSONL sign-in sheet
+# flask staff import-hours <staff_id> <file> [--dry-run]
+@app.cli.command("import-hours", help="Log hours from a .csv or .jsonl sheet with hours and student_id or student columns.")
+@click.argument("staff_id", type=int)
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option("--chunk-size", type=click.IntRange(min=1), default=500, help="Rows written per transaction (default: 500).")
+@click.option("--dry-run", is_flag=True, help="Validate the file and report errors without logging any hours.")
+def import_hours_command(staff_id, file, chunk_size, dry_run):
+
+    try:
+        summary = import_hours_file(staff_id, file, chunk_size, dry_run)
+    except ValueError as e:
+        print(e)
+        return
+
+    if summary is None:
+        print("Invalid staff id!")
+        return
+
+    action = "Would import" if dry_run else "Imported"
+    print(f"{action} {summary['imported']} logs totalling {summary['hours']} hours with {summary['error_count']} errors.")
+    if summary['errors']:
+        table = [[e['line'], e['message']] for e in summary['errors']]
+        print(tabulate(table, headers=["Line", "Error"], tablefmt="grid"))
+
+
+# Command to list the accolade milestones
+# flask staff milestones
+
+@app.cli.command("milestones", help="List the accolade milestones students can earn.")
+def milestones_command():
+    milestones = get_milestones()
+
+    if milestones:
+        table = [[m.threshold, m.name, m.badge or ""] for m in milestones]
+        print(tabulate(table, headers=["Hours", "Accolade", "Badge"], tablefmt="grid"))
+    else:
+        print("No milestones found!")
+
+
+# Command to add a milestone tier; students already past it are awarded it
+# flask staff add-milestone <hours> <name>
+
+@app.cli.command("add-milestone", help="Add an accolade milestone and award it to students already past it.")
+@click.argument("hours", type=int)
+@click.argument("name")
+def add_milestone_command(hours, name):
+
+    milestone = add_milestone(hours, name)
+
+    if milestone:
+        print(f"Added {milestone.name} accolade at {milestone.threshold} hours!")
+    else:
+        print("Invalid hours or a milestone already exists at that many hours!")
+
+
+# Command to stop awarding a milestone tier
+# flask staff remove-milestone <hours>
+
+@app.cli.command("remove-milestone", help="Stop awarding an accolade milestone. Accolades already earned are kept.")
+@click.argument("hours", type=int)
+def remove_milestone_command(hours):
+
+    if remove_milestone(hours):
+        print(f"Removed the {hours} hour milestone!")
+    else:
+        print("No milestone found at that many hours!")
+
+
+# Command to export hour logs for reporting as NDJSON or CSV, streamed batch by batch
+# flask staff export-logs --format csv --start 2024-01-01 --end 2024-04-30 --output logs.csv
+
+@app.cli.command("export-logs", help="Export hour logs with student and staff usernames as NDJSON or CSV.")
+@click.option("--format", "fmt", type=click.Choice(REPORT_FORMATS), default="ndjson", help="Output format (default: ndjson).")
+@click.option("--start", default=None, help="Only logs created on or after this date (YYYY-MM-DD).")
+@click.option("--end", default=None, help="Only logs created on or before this date (YYYY-MM-DD).")
+@click.option("--status", type=click.Choice(REPORT_STATUSES), default=None, help="Only logs with this status.")
+@click.option("--staff-id", type=int, default=None, help="Only logs handled by this staff member.")
+@click.option("--output", type=click.File("w"), default="-", help="File to write to (default: stdout).")
+def export_logs_command(fmt, start, end, status, staff_id, output):
+
+    try:
+        start = parse_report_date(start) if start else None
+        end = parse_report_date(end, end=True) if end else None
+    except ValueError:
+        print("Dates must look like 2024-01-31!")
+        return
+
+    for chunk in export_hour_logs(fmt, start=start, end=end, status=status, staff_id=staff_id):
+        output.write(chunk)
+
+
+# Command to compare reviewers: logs confirmed/denied, hours approved and review turnaround
+# flask staff staff-stats --start 2024-01-01 --end 2024-04-30
+
+@app.cli.command("staff-stats", help="Show each staff member's reviews, hours approved and review turnaround.")
+@click.option("--start", default=None, help="Only logs reviewed on or after this date (YYYY-MM-DD).")
+@click.option("--end", default=None, help="Only logs reviewed on or before this date (YYYY-MM-DD).")
+@click.option("--staff-id", type=int, default=None, help="Only this staff member.")
+def staff_stats_command(start, end, staff_id):
+
+    try:
+        start = parse_report_date(start) if start else None
+        end = parse_report_date(end, end=True) if end else None
+    except ValueError:
+        print("Dates must look like 2024-01-31!")
+        return
+
+    rows = get_staff_review_stats(start, end, staff_id)
+    if not rows:
+        print("No reviews found!")
+        return
+
+    table = []
+    for row in rows:
+        stats = staff_review_stats_json(row)
+        turnaround = stats['turnaround_seconds']
+        table.append([
+            stats['staff_id'], stats['username'], stats['confirmed'], stats['denied'], stats['hours_approved'],
+            *[format_turnaround(turnaround[key]) for key in ('p50', 'p90', 'p95')]
+        ])
+    print(tabulate(table, headers=["Staff ID", "Staff", "Confirmed", "Denied", "Hours Approved", "Median Wait", "p90 Wait", "p95 Wait"], tablefmt="grid"))
+
+
+def format_turnaround(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+# Command to find the slowest endpoints and queries, from a running server or by replaying GETs here
+# flask profile-report --path /leaderboard --path /api/users --repeat 20
+# flask profile-report --url http://localhost:8080 --token <METRICS_TOKEN>
+
+@app.cli.command("profile-report", help="Show the slowest endpoints and SQL statements recorded by the profiling middleware.")
+@click.option("--url", default=None, help="Base URL of a server running with PROFILING_ENABLED.")
+@click.option("--path", "paths", multiple=True, help="Path to replay through a test client (repeatable).")
+@click.option("--repeat", type=int, default=10, help="Times to replay each path (default: 10).")
+@click.option("--limit", type=int, default=10, help="Rows to show per table (default: 10).")
+@click.option("--token", envvar="METRICS_TOKEN", default=None, help="The server's METRICS_TOKEN or a staff JWT, for --url.")
+def profile_report_command(url, paths, repeat, limit, token):
+
+    if url:
+        headers = {'Authorization': f"Bearer {token}"} if token else {}
+        with urlopen(Request(f"{url.rstrip('/')}/metrics/profile?limit={limit}", headers=headers)) as response:
+            report = json.load(response)
+    else:
+        app.config['PROFILING_ENABLED'] = True
+        init_profiling(app)
+        reset_profiling()
+        client = app.test_client()
+        for path in paths or ('/leaderboard', '/api/users', '/health'):
+            for _ in range(repeat):
+                client.get(path)
+        report = profile_report(limit)
+
+    if not report['endpoints']:
+        print("No requests recorded! Is PROFILING_ENABLED set on the server?")
+        return
+
+    print(tabulate(
+        [[e['endpoint'], e['requests'], f"{e['mean_seconds'] * 1000:.1f}", f"{e['max_seconds'] * 1000:.1f}",
+          f"{e['mean_sql_statements']:.1f}", f"{e['mean_sql_seconds'] * 1000:.1f}", e['n_plus_one']]
+         for e in report['endpoints']],
+        headers=["Endpoint", "Requests", "Mean ms", "Max ms", "SQL/Request", "SQL ms/Request", "N+1"], tablefmt="grid"
+    ))
+    print(tabulate(
+        [[" ".join(s['statement'].split())[:80], s['count'], f"{s['seconds'] * 1000:.1f}", f"{s['max_seconds'] * 1000:.1f}"]
+         for s in report['statements']],
+        headers=["Statement", "Count", "Total ms", "Max ms"], tablefmt="grid"
+    ))
+
+
 #app.cli.add_command(staff_cli)
 
 